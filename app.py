@@ -8,7 +8,11 @@ from routes.dns import dns_bp
 from routes.header_checker import header_checker_bp
 from routes.policy_generator import policy_generator_bp
 from routes.whois_checker import whois_checker_bp
+from routes.watchlist import watchlist_bp
+from routes.history import history_bp
+from watcher import watch_scheduler
 from utils import create_response
+from errors import ERROR_NOT_FOUND, ERROR_INTERNAL
 
 app = Flask(__name__)
 
@@ -25,6 +29,16 @@ app.register_blueprint(dns_bp)
 app.register_blueprint(header_checker_bp) 
 app.register_blueprint(policy_generator_bp) 
 app.register_blueprint(whois_checker_bp) 
+app.register_blueprint(watchlist_bp)
+app.register_blueprint(history_bp)
+
+# Refresh watched lookups in the background, started by the first request each
+# process serves: not on import, so scripts and tests don't make outbound requests,
+# and after any fork, so every gunicorn worker (even with --preload) runs its own.
+@app.before_request
+def start_watch_scheduler():
+    if Config.WATCH_ENABLED:
+        watch_scheduler.start()
 
 # --- Global Error Handlers ---
 @app.errorhandler(404)
@@ -33,7 +47,8 @@ def not_found_error(error):
         success=False,
         message="The requested URL was not found on the server. If you entered the URL manually please check your spelling and try again.",
         errors=["Not Found"],
-        status_code=404
+        status_code=404,
+        error_code=ERROR_NOT_FOUND
     )
     return jsonify(response), status_code
 
@@ -44,7 +59,8 @@ def internal_error(error):
         success=False,
         message="An internal server error occurred. Please try again later.",
         errors=["Internal Server Error"],
-        status_code=500
+        status_code=500,
+        error_code=ERROR_INTERNAL
     )
     return jsonify(response), status_code
 
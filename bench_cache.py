@@ -0,0 +1,94 @@
+# bench_cache.py
+#
+# Compares the cache backends (see cache.create_cache) the way gunicorn uses
+# them: several worker processes looking up the same set of targets.
+#
+#   python bench_cache.py [--workers 4] [--keys 500] [--gets 3000]
+#
+# Each worker picks targets at random; a miss stores a typical lookup result,
+# as cached_lookup does. Reports the hit ratio across all workers and the
+# mean latency of a get for each backend.
+
+import argparse
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+
+import cache
+from config import Config
+
+# A typical /dns_lookup result, as built by create_response
+RESULT = ({
+    'success': True,
+    'message': 'DNS records fetched successfully.',
+    'data': {
+        'domain': 'example.com',
+        'records': {
+            'A': [{'host': 'example.com', 'type': 'A', 'ttl': 300, 'ip': f'192.0.2.{index}'} for index in range(4)],
+            'MX': [{'host': 'example.com', 'type': 'MX', 'ttl': 300, 'pri': 10, 'target': 'mail.example.com'}],
+            'TXT': [{'host': 'example.com', 'type': 'TXT', 'ttl': 300, 'txt': 'v=spf1 include:_spf.example.com -all'}]
+        }
+    },
+    'errors': [],
+    'error_code': None
+}, 200)
+
+
+def worker(backend, db_path, seed, keys, gets, results):
+    Config.CACHE_BACKEND = backend
+    Config.CACHE_DB_PATH = db_path
+    worker_cache = cache.create_cache('bench', keys * 2, track_access=False)
+    rng = random.Random(seed)
+    hits = 0
+    get_time = 0.0
+    for _ in range(gets):
+        key = cache.make_cache_key('dns', f'domain{rng.randrange(keys)}.example')
+        started = time.perf_counter()
+        value = worker_cache.get(key)
+        get_time += time.perf_counter() - started
+        if value is None:
+            worker_cache.set(key, RESULT, Config.DNS_RESULT_TTL)
+        else:
+            hits += 1
+    results.put((hits, get_time))
+
+
+def run(backend, workers, keys, gets):
+    data_dir = tempfile.mkdtemp(prefix='bench_cache_')
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(backend, f'{data_dir}/cache.sqlite3', seed, keys, gets, results))
+            for seed in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(data_dir)
+
+    hits = sum(hits for hits, _ in totals)
+    get_time = sum(get_time for _, get_time in totals)
+    total_gets = workers * gets
+    print(f'{backend:<8} hit ratio {hits / total_gets:>7.2%}   mean get {get_time / total_gets * 1e6:>7.1f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the per-process and shared cache backends.')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--keys', type=int, default=500, help='Distinct lookup targets')
+    parser.add_argument('--gets', type=int, default=3000, help='Gets per worker')
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.keys} targets, {args.gets} gets each; '
+          f'serialised result is {len(cache.serialize(RESULT))} bytes')
+    for backend in ('memory', 'sqlite'):
+        run(backend, args.workers, args.keys, args.gets)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+# cache.py
+
+import marshal
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from config import Config
+from history import record_result
+from sqlite_pool import SQLiteConnectionPool
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry expiry and LRU eviction.
+    With track_access it also counts how often each key is requested, which
+    the watch scheduler uses to prioritise refreshes.
+    """
+    # Each worker process has its own copy
+    shared = False
+
+    def __init__(self, max_entries=1024, track_access=True):
+        self.max_entries = max_entries
+        self.track_access = track_access
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._access_counts = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value, or None if the key is missing or expired.
+        """
+        with self._lock:
+            if self.track_access:
+                self._access_counts[key] += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        Stores a value for ttl seconds, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_expiry(self, key):
+        """
+        Returns the Unix timestamp at which the key expires, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return entry[0]
+
+    def drain_access_counts(self):
+        """
+        Returns the request counts per key since the last call, and resets them.
+        """
+        with self._lock:
+            counts = self._access_counts
+            self._access_counts = Counter()
+            return counts
+
+
+# Values at least this large are zlib-compressed before they are stored
+COMPRESS_MIN_BYTES = 512
+FLAG_RAW = b'\x00'
+FLAG_ZLIB = b'\x01'
+
+
+def serialize(value):
+    """
+    Encodes a cached value (dicts, lists, strings, numbers, ...) as compact bytes.
+    marshal is much faster than pickle or JSON for plain data and only needs to be
+    read back by the same Python on the same host.
+    """
+    data = marshal.dumps(value)
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return FLAG_ZLIB + zlib.compress(data, 1)
+    return FLAG_RAW + data
+
+
+def deserialize(blob):
+    data = blob[1:]
+    if blob[:1] == FLAG_ZLIB:
+        data = zlib.decompress(data)
+    return marshal.loads(data)
+
+
+class SQLiteCache:
+    """
+    Cache shared by every worker process on the host, stored in a local SQLite
+    database in WAL mode (readers never block the writer).
+
+    It has the same interface as TTLCache. Each get is a single read and each
+    set a single transaction, so both are atomic. Expired entries are skipped on
+    read. Every set also deletes expired entries and then evicts the least
+    recently used ones, so the table never holds more than max_entries. Hits
+    are noted in memory and their access times written by the next set, so a
+    get never waits for the write lock. Access counts stay per process, like TTLCache.
+
+    The cache is best effort: if the database is locked or unusable, get
+    behaves like a miss and set does nothing, rather than failing the lookup.
+    """
+    shared = True
+
+    def __init__(self, path, table, max_entries=1024, track_access=True):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.track_access = track_access
+        self._pool = SQLiteConnectionPool(path, setup=self._create_table)
+        self._access_counts = Counter()
+        self._accessed = {} # key -> time of the last hit not yet written to the database
+        self._lock = threading.Lock()
+
+    def _create_table(self, connection):
+        row = connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+        ).fetchone()
+        if row is not None and ('accessed_at' not in row[0] or 'WITHOUT ROWID' in row[0].upper()):
+            # Left by an older version of this cache; it's only a cache, so start afresh
+            connection.execute(f'DROP TABLE {self.table}')
+        # A plain rowid table: values are WHOIS and header results of several KB,
+        # too large to sit in a WITHOUT ROWID table's primary key B-tree
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_expiry ON {self.table} (expires_at)')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_access ON {self.table} (accessed_at)')
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._pool.connection() as connection:
+                row = connection.execute(
+                    f'SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+            value = deserialize(row[0]) if row else None
+        except (sqlite3.Error, ValueError, EOFError, zlib.error): # Locked database or unreadable entry
+            value = None
+        with self._lock:
+            if self.track_access:
+                self._access_counts[key] += 1
+            if value is not None and (key in self._accessed or len(self._accessed) < self.max_entries):
+                self._accessed[key] = now
+        return value
+
+    def set(self, key, value, ttl):
+        try:
+            blob = serialize(value)
+        except ValueError:
+            return # Not plain data, so it can't be shared; skip caching it
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        now = time.time()
+        try:
+            with self._pool.connection() as connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.executemany(
+                    f'UPDATE {self.table} SET accessed_at = max(accessed_at, ?) WHERE key = ?',
+                    [(accessed_at, accessed_key) for accessed_key, accessed_at in accessed.items()]
+                )
+                connection.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, blob, now + ttl, now)
+                )
+                self._evict(connection, now)
+                connection.execute('COMMIT')
+        except sqlite3.Error:
+            pass # The pool rolls back the unfinished transaction
+
+    def _evict(self, connection, now):
+        """
+        Deletes expired entries, then the least recently used ones until at most max_entries remain.
+        """
+        connection.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?', (now,))
+        connection.execute(
+            f'DELETE FROM {self.table} WHERE key IN ('
+            f'  SELECT key FROM {self.table} ORDER BY accessed_at'
+            f'  LIMIT max(0, (SELECT COUNT(*) FROM {self.table}) - ?))',
+            (self.max_entries,)
+        )
+
+    def delete(self, key):
+        try:
+            with self._pool.connection() as connection:
+                connection.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+        except sqlite3.Error:
+            pass
+
+    def get_expiry(self, key):
+        try:
+            with self._pool.connection() as connection:
+                row = connection.execute(
+                    f'SELECT expires_at FROM {self.table} WHERE key = ? AND expires_at > ?', (key, time.time())
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def drain_access_counts(self):
+        with self._lock:
+            counts = self._access_counts
+            self._access_counts = Counter()
+            return counts
+
+
+def create_cache(table, max_entries, track_access=True):
+    """
+    Creates a cache using the backend chosen in Config.CACHE_BACKEND:
+    'memory' (per process) or 'sqlite' (shared by all workers on the host).
+    """
+    if Config.CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(Config.CACHE_DB_PATH, table, max_entries=max_entries, track_access=track_access)
+    return TTLCache(max_entries=max_entries, track_access=track_access)
+
+
+# Shared cache for the results of the lookup routes
+# Access counts are only drained by the watch scheduler, so only track them when it runs
+result_cache = create_cache('results', Config.RESULT_CACHE_MAX_ENTRIES, track_access=Config.WATCH_ENABLED)
+
+
+def make_cache_key(kind, target):
+    """
+    Builds the cache key for a lookup, e.g. "dns:example.com".
+    """
+    return f'{kind}:{target}'
+
+
+def run_lookup(kind, target, lookup_func, ttl):
+    """
+    Runs lookup_func(target) and, if it succeeded (200), caches the result and
+    appends it to the history store. Returns (response, status_code).
+    """
+    response, status_code = lookup_func(target)
+    if status_code == 200:
+        result_cache.set(make_cache_key(kind, target), (response, status_code), ttl)
+        if Config.HISTORY_ENABLED:
+            try:
+                record_result(kind, target, response)
+            except Exception:
+                pass # History is best effort and must never fail the lookup itself
+    return response, status_code
+
+
+def cached_lookup(kind, target, lookup_func, ttl):
+    """
+    Returns the cached (response, status_code) for a lookup, running it on a miss.
+    Only successful (200) results are cached. A cache that can't be read (e.g. a
+    locked shared database) counts as a miss, so it never fails the lookup itself.
+    """
+    cached = result_cache.get(make_cache_key(kind, target))
+    if cached is not None:
+        return cached
+    return run_lookup(kind, target, lookup_func, ttl)
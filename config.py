@@ -1,8 +1,75 @@
 # config.py
 
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     # IMPORTANT: Adjust this for your production environment
     # For local testing, you might use "*" or "http://localhost:5000"
     # For your Blogger site, it should be your Blogger domain.
     CORS_ALLOW_ORIGIN = "https://www.codersikarwar.site" # Or "*" for broader access during development
-    # Add other configurations here (e.g., database URIs, API keys)
\ No newline at end of file
+    # Add other configurations here (e.g., database URIs, API keys)
+
+    # Limits applied to every outbound HTTP fetch (see fetcher.bounded_fetch)
+    FETCH_MAX_BODY_BYTES = 2 * 1024 * 1024 # Bodies larger than this are truncated
+    # Responses with larger header blocks are rejected. This is checked after the headers
+    # have been read and parsed, so it is not a read limit; http.client itself caps
+    # what it reads at 100 header lines of at most 64 KB each.
+    FETCH_MAX_HEADER_BYTES = 64 * 1024
+    FETCH_MAX_REDIRECTS = 10
+    FETCH_DEADLINE_SECONDS = 20 # Overall wall-clock budget, including redirects and body
+    FETCH_CHUNK_SIZE = 16 * 1024
+
+    # Outbound connections for HTTP checks (see resolver.py)
+    DNS_CACHE_SIZE = 1024 # Entries in the shared dnspython answer cache
+    HAPPY_EYEBALLS_DELAY = 0.25 # Seconds before racing the next address (RFC 8305 default)
+    HAPPY_EYEBALLS_RESOLUTION_DELAY = 0.05 # Seconds an A answer waits for the AAAA answer
+
+    # Directory for local state (watch list, history, ...)
+    DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+    # Per-process cache for lookup results (see cache.py)
+    RESULT_CACHE_MAX_ENTRIES = 4096
+    DNS_RESULT_TTL = 300 # Seconds
+    WHOIS_RESULT_TTL = 6 * 60 * 60
+    HEADER_RESULT_TTL = 300
+
+    # Background refresh of watched lookups (see watcher.py)
+    WATCH_ENABLED = True
+    WATCH_STATE_PATH = os.path.join(DATA_DIR, 'watchlist.json')
+    WATCH_TICK_SECONDS = 5
+    WATCH_MAX_CONCURRENT_REFRESHES = 4
+    WATCH_REFRESH_LEAD = 0.2 # Refresh when less than this fraction of the TTL is left...
+    WATCH_JITTER = 0.1 # ...plus a random extra of up to this fraction of the TTL
+    WATCH_RETRY_SECONDS = 60 # Wait before retrying a failed refresh
+
+    # Local history of lookup results, for change detection (see history.py)
+    HISTORY_ENABLED = True
+    HISTORY_DB_PATH = os.path.join(DATA_DIR, 'history.sqlite3')
+    HISTORY_MAX_CHANGES = 500 # Distinct results kept per target; older changes are deleted
+
+    # Hosts that just failed are remembered for a short time, per error code, so
+    # repeated checks fail immediately instead of waiting out the timeouts again (see errors.py)
+    NEGATIVE_CACHE_MAX_ENTRIES = 4096
+    NEGATIVE_CACHE_TTLS = {
+        'TIMEOUT': 30, # Seconds
+        'NXDOMAIN': 60,
+        'CONNECTION_REFUSED': 30,
+        'CONNECTION_ERROR': 30,
+        'TLS_ERROR': 60,
+        'RATE_LIMITED': 60
+    }
+
+    # Distinct header values whose parsed analysis is memoised (see header_analysis.py)
+    HEADER_ANALYSIS_CACHE_SIZE = 2048
+
+    # Concurrent PTR lookups for /dns_lookup?reverse=1
+    REVERSE_DNS_MAX_WORKERS = 8
+    REVERSE_DNS_DEADLINE_SECONDS = 6 # For a whole batch, including time queued behind other requests
+
+    # Where cached lookup results live (see cache.py):
+    # 'memory' keeps a separate cache in each process, 'sqlite' shares one between
+    # all worker processes on the host (recommended under gunicorn with several workers)
+    CACHE_BACKEND = 'memory'
+    CACHE_DB_PATH = os.path.join(DATA_DIR, 'cache.sqlite3')
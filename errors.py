@@ -0,0 +1,218 @@
+# errors.py
+
+import socket
+import ssl
+from urllib.parse import urlparse
+import dns.exception
+import dns.resolver
+import requests
+from config import Config
+from cache import create_cache
+from fetcher import FetchLimitExceeded
+from utils import create_response
+
+# Stable error codes returned in the 'error_code' field of every error response
+ERROR_INVALID_INPUT = 'INVALID_INPUT'
+ERROR_NOT_FOUND = 'NOT_FOUND'
+ERROR_TIMEOUT = 'TIMEOUT'
+ERROR_NXDOMAIN = 'NXDOMAIN'
+ERROR_CONNECTION_REFUSED = 'CONNECTION_REFUSED'
+ERROR_CONNECTION = 'CONNECTION_ERROR'
+ERROR_TLS = 'TLS_ERROR'
+ERROR_RATE_LIMITED = 'RATE_LIMITED'
+ERROR_RESPONSE_TOO_LARGE = 'RESPONSE_TOO_LARGE'
+ERROR_TOO_MANY_REDIRECTS = 'TOO_MANY_REDIRECTS'
+ERROR_UPSTREAM = 'UPSTREAM_ERROR'
+ERROR_INTERNAL = 'INTERNAL_ERROR'
+
+# getaddrinfo errors that mean the name definitely doesn't exist, as opposed to
+# EAI_AGAIN ("temporary failure in name resolution"), which means the DNS is unavailable
+NAME_NOT_FOUND_ERRNOS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+
+class CheckError(Exception):
+    """
+    Base class for failures of a lookup against a remote host.
+    Each subclass carries a stable error code and the HTTP status to return.
+    """
+    code = ERROR_INTERNAL
+    status_code = 500
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class UpstreamTimeout(CheckError):
+    code = ERROR_TIMEOUT
+    status_code = 504
+
+
+class DomainNotFound(CheckError):
+    code = ERROR_NXDOMAIN
+    status_code = 404
+
+
+class ConnectionRefused(CheckError):
+    code = ERROR_CONNECTION_REFUSED
+    status_code = 502
+
+
+class UpstreamConnectionError(CheckError):
+    code = ERROR_CONNECTION
+    status_code = 502
+
+
+class TLSFailure(CheckError):
+    code = ERROR_TLS
+    status_code = 502
+
+
+class RateLimited(CheckError):
+    code = ERROR_RATE_LIMITED
+    status_code = 429
+
+
+class ResponseTooLarge(CheckError):
+    code = ERROR_RESPONSE_TOO_LARGE
+    status_code = 502
+
+
+class TooManyRedirects(CheckError):
+    code = ERROR_TOO_MANY_REDIRECTS
+    status_code = 502
+
+
+class UpstreamError(CheckError):
+    code = ERROR_UPSTREAM
+    status_code = 502
+
+
+def iter_exception_chain(exception):
+    """
+    Yields an exception and everything it wraps: __cause__, __context__ and the
+    .reason / args[0] nesting that requests and urllib3 use.
+    """
+    seen = set()
+    pending = [exception]
+    while pending:
+        current = pending.pop(0)
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        pending.extend([current.__cause__, current.__context__, getattr(current, 'reason', None)])
+        if current.args and isinstance(current.args[0], BaseException):
+            pending.append(current.args[0])
+
+
+def classify_exception(exception):
+    """
+    Maps an exception raised while checking a remote host to a CheckError.
+    """
+    if isinstance(exception, CheckError):
+        return exception
+
+    chain = list(iter_exception_chain(exception))
+    message = str(exception)
+
+    def any_instance(*types):
+        return any(isinstance(item, types) for item in chain)
+
+    resolution_errnos = {item.errno for item in chain if isinstance(item, socket.gaierror)}
+    if any_instance(dns.resolver.NXDOMAIN) or resolution_errnos & NAME_NOT_FOUND_ERRNOS:
+        return DomainNotFound(f'The domain name could not be resolved: {message}')
+    if socket.EAI_AGAIN in resolution_errnos:
+        return UpstreamTimeout(f'The DNS did not answer in time: {message}')
+    if any_instance(requests.exceptions.Timeout, socket.timeout, dns.exception.Timeout):
+        return UpstreamTimeout(f'The remote host did not respond in time: {message}')
+    if any_instance(requests.exceptions.SSLError, ssl.SSLError):
+        return TLSFailure(f'TLS handshake or certificate verification failed: {message}')
+    if any_instance(ConnectionRefusedError):
+        return ConnectionRefused(f'The remote host refused the connection: {message}')
+    if any_instance(requests.exceptions.TooManyRedirects):
+        return TooManyRedirects(f'The URL redirected too many times: {message}')
+    if any_instance(FetchLimitExceeded):
+        return ResponseTooLarge(f'The response exceeded a fetch limit: {message}')
+
+    http_error = next((item for item in chain if isinstance(item, requests.exceptions.HTTPError)), None)
+    if http_error is not None and http_error.response is not None and http_error.response.status_code == 429:
+        return RateLimited(f'The remote host is rate limiting requests: {message}')
+    if 'rate limit' in message.lower() or 'quota exceeded' in message.lower():
+        return RateLimited(f'The remote server is rate limiting requests: {message}')
+
+    if any_instance(requests.exceptions.ConnectionError, ConnectionError):
+        return UpstreamConnectionError(f'Could not connect to the remote host: {message}')
+    if any_instance(requests.exceptions.RequestException, dns.exception.DNSException):
+        return UpstreamError(f'The remote host returned an error: {message}')
+    return CheckError(f'An unexpected error occurred: {message}')
+
+
+# CheckError class for each error code, to rebuild errors read back from the failure cache
+ERROR_CLASSES = {
+    error_class.code: error_class for error_class in (
+        CheckError, UpstreamTimeout, DomainNotFound, ConnectionRefused, UpstreamConnectionError,
+        TLSFailure, RateLimited, ResponseTooLarge, TooManyRedirects, UpstreamError
+    )
+}
+
+# Short-lived memory of hosts that just failed, so repeated requests fail fast.
+# Stores (code, message) rather than the exception so any cache backend can hold it.
+failure_cache = create_cache('failures', Config.NEGATIVE_CACHE_MAX_ENTRIES, track_access=False)
+
+
+def get_origin(url):
+    """
+    Returns scheme://host:port for a URL, the key under which failed HTTP checks
+    are remembered: refused connections and TLS errors depend on the port and
+    scheme, not just the host. Returns None if the URL has no usable host or port.
+    """
+    try:
+        parsed = urlparse(url)
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    except ValueError:
+        return None
+    if not parsed.hostname:
+        return None
+    return f'{parsed.scheme}://{parsed.hostname}:{port}'
+
+
+def get_cached_failure(scope, host):
+    """
+    Returns the CheckError recorded for a host that failed recently, or None.
+    scope separates kinds of check, e.g. a host can be dead over HTTP but still answer DNS.
+    For 'http' checks, host is the origin of the URL (see get_origin).
+    """
+    if not host:
+        return None
+    cached = failure_cache.get(f'{scope}:{host.lower()}')
+    if cached is None:
+        return None
+    code, message = cached
+    return ERROR_CLASSES.get(code, CheckError)(message)
+
+
+def remember_failure(scope, host, error):
+    """
+    Records a failed check so the next ones fail immediately with the same error.
+    Only failures listed in NEGATIVE_CACHE_TTLS are remembered.
+    """
+    ttl = Config.NEGATIVE_CACHE_TTLS.get(error.code)
+    if host and ttl:
+        failure_cache.set(f'{scope}:{host.lower()}', (error.code, error.message), ttl)
+
+
+def error_response(error, message=None, data=None, errors=None, cached=False):
+    """
+    Builds a create_response tuple for a CheckError, including its error code.
+    """
+    if cached and isinstance(data, dict):
+        data['failure_cached'] = True
+    return create_response(
+        success=False,
+        message=message or error.message,
+        data=data,
+        errors=errors if errors is not None else [error.message],
+        status_code=error.status_code,
+        error_code=error.code
+    )
@@ -0,0 +1,393 @@
+# fetcher.py
+
+import codecs
+import re
+import socket
+import threading
+import time
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from charset_normalizer import from_bytes
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from config import Config
+from resolver import happy_eyeballs_connect, get_family_name
+
+# charset declared in the Content-Type header, e.g. "text/html; charset=utf-8"
+CONTENT_TYPE_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+# Details of the most recent outbound connection made by this thread
+_connection_info = threading.local()
+
+
+class HappyEyeballsConnectionMixin:
+    """
+    Replaces urllib3's system-resolver connect with a lookup through the shared
+    caching resolver and a happy-eyeballs race between the returned addresses.
+    """
+
+    def _new_conn(self):
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else None
+        try:
+            sock, family, address = happy_eyeballs_connect(
+                self._dns_host,
+                self.port,
+                timeout=timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+        # Let the running fetch's deadline cut this connection off when it expires
+        deadline = getattr(_connection_info, 'deadline', None)
+        if deadline is not None:
+            deadline.watch(sock)
+
+        _connection_info.last = {
+            'host': self.host,
+            'resolved_address': address,
+            'address_family': get_family_name(family)
+        }
+        return sock
+
+
+class HappyEyeballsHTTPConnection(HappyEyeballsConnectionMixin, HTTPConnection):
+    pass
+
+
+class HappyEyeballsHTTPSConnection(HappyEyeballsConnectionMixin, HTTPSConnection):
+    pass
+
+
+class HappyEyeballsHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = HappyEyeballsHTTPConnection
+
+
+class HappyEyeballsHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = HappyEyeballsHTTPSConnection
+
+
+class HappyEyeballsAdapter(HTTPAdapter):
+    """
+    requests transport adapter whose connections use HappyEyeballsConnectionMixin.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': HappyEyeballsHTTPConnectionPool,
+            'https': HappyEyeballsHTTPSConnectionPool
+        }
+
+
+class BoundedSession(requests.Session):
+    """
+    Session that never follows redirects itself, so bounded_fetch can.
+    requests reads (and buffers) the body of every redirect response it
+    resolves, even with allow_redirects=False, where it still prepares the next hop.
+    """
+
+    def resolve_redirects(self, *args, **kwargs):
+        return iter(())
+
+
+class FetchLimitExceeded(requests.exceptions.RequestException):
+    """
+    Raised when a response breaks one of the hard fetch limits (e.g. header size).
+    Subclasses RequestException so existing request error handling still applies.
+    """
+
+
+class FetchDeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when the overall wall-clock deadline expires before the headers arrive.
+    """
+
+
+class FetchDeadline:
+    """
+    Overall wall-clock budget of one bounded_fetch call.
+
+    Socket timeouts only bound each single read, so a server dripping a byte at
+    a time could keep a fetch alive forever. When the budget runs out a timer
+    shuts down every socket the fetch opened, which makes any blocked read
+    return immediately.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expired = False
+        self._sockets = []
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(max(seconds, 0), self.expire)
+        self._timer.daemon = True
+
+    def __enter__(self):
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._timer.cancel()
+        with self._lock:
+            for sock in self._sockets:
+                sock.close()
+            self._sockets = []
+
+    def remaining(self):
+        return self.seconds - (time.monotonic() - self.started)
+
+    def watch(self, sock):
+        """
+        Registers a newly connected socket. A duplicate is kept because the TLS
+        layer takes over (detaches) the original socket object.
+        """
+        with self._lock:
+            watched = sock.dup()
+            self._sockets.append(watched)
+            if self.expired:
+                self._shutdown(watched)
+
+    def expire(self):
+        with self._lock:
+            self.expired = True
+            for sock in self._sockets:
+                self._shutdown(sock)
+
+    @staticmethod
+    def _shutdown(sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass # Already closed by the other side
+
+
+def get_fetch_limits(max_body_bytes=None, max_header_bytes=None, max_redirects=None, deadline=None):
+    """
+    Returns the effective fetch limits, falling back to the values in Config.
+    """
+    return {
+        'max_body_bytes': max_body_bytes if max_body_bytes is not None else Config.FETCH_MAX_BODY_BYTES,
+        'max_header_bytes': max_header_bytes if max_header_bytes is not None else Config.FETCH_MAX_HEADER_BYTES,
+        'max_redirects': max_redirects if max_redirects is not None else Config.FETCH_MAX_REDIRECTS,
+        'deadline_seconds': deadline if deadline is not None else Config.FETCH_DEADLINE_SECONDS
+    }
+
+
+def get_header_size(headers):
+    """
+    Approximates the on-the-wire size of a header block ("Name: value\\r\\n" per header).
+    """
+    return sum(len(name) + len(value) + 4 for name, value in headers.items())
+
+
+def detect_charset(http_response, first_chunk):
+    """
+    Picks a charset for the body using only the headers and the first chunk:
+    the Content-Type charset, then a <meta> charset, then charset-normalizer.
+    The (comparatively slow) charset-normalizer only runs if neither is usable.
+    """
+    candidates = []
+
+    match = CONTENT_TYPE_CHARSET_RE.search(http_response.headers.get('Content-Type', ''))
+    if match:
+        candidates.append(match.group(1))
+
+    match = META_CHARSET_RE.search(first_chunk)
+    if match:
+        candidates.append(match.group(1).decode('ascii', 'ignore'))
+
+    for charset in candidates:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            continue
+
+    if first_chunk:
+        best_guess = from_bytes(first_chunk).best()
+        if best_guess is not None:
+            return codecs.lookup(best_guess.encoding).name
+    return 'utf-8'
+
+
+def get_redirect_method(method, status_code):
+    """
+    Returns the method to use for the next hop of a redirect, following the
+    same rules as browsers (and requests): 303, and 301/302 after a POST, become GET.
+    """
+    if status_code == 303 and method != 'HEAD':
+        return 'GET'
+    if status_code in (301, 302) and method == 'POST':
+        return 'GET'
+    return method
+
+
+def bounded_fetch(url, method='GET', headers=None, timeout=10, read_body=True, allow_redirects=True,
+                  max_body_bytes=None, max_header_bytes=None, max_redirects=None, deadline=None):
+    """
+    Fetches a URL with hard limits on body size, header size, redirects and total time.
+
+    The body is streamed and decoded incrementally, so memory use is bounded by
+    max_body_bytes no matter how large the remote response is. Redirects are
+    followed here rather than by requests, so the bodies of redirect responses
+    are never read at all. A body that hits the size cap or the deadline is
+    truncated rather than rejected; the result says so via 'truncated' and
+    'truncation_reason'. When read_body is False the connection is closed as
+    soon as the headers have been received.
+
+    Hostnames are resolved through the shared caching resolver and connected
+    with a happy-eyeballs race (see resolver.py); the address and family that
+    won are returned under 'connection'.
+
+    Returns a dict with the (closed) requests response, the decoded text, the
+    connection details and the limits that were applied.
+    """
+    limits = get_fetch_limits(max_body_bytes, max_header_bytes, max_redirects, deadline)
+
+    result = {
+        'response': None,
+        'text': None,
+        'encoding': None,
+        'body_bytes': 0,
+        'truncated': False,
+        'truncation_reason': None,
+        'connection': None,
+        'limits': limits
+    }
+
+    def deadline_exceeded(http_response=None):
+        return FetchDeadlineExceeded(
+            f"Fetch deadline of {limits['deadline_seconds']} seconds exceeded.",
+            response=http_response
+        )
+
+    def check_limits(http_response, *args, **kwargs):
+        # Runs for every response, including each redirect hop
+        if fetch_deadline.remaining() <= 0:
+            http_response.close()
+            raise deadline_exceeded(http_response)
+        header_size = get_header_size(http_response.headers)
+        if header_size > limits['max_header_bytes']:
+            http_response.close()
+            raise FetchLimitExceeded(
+                f"Response headers too large ({header_size} bytes, limit {limits['max_header_bytes']}).",
+                response=http_response
+            )
+        return http_response
+
+    _connection_info.last = None
+    with BoundedSession() as session, FetchDeadline(limits['deadline_seconds']) as fetch_deadline:
+        _connection_info.deadline = fetch_deadline
+        try:
+            adapter = HappyEyeballsAdapter(max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.hooks['response'].append(check_limits)
+
+            history = []
+            while True:
+                try:
+                    http_response = session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        allow_redirects=False,
+                        timeout=min(timeout, max(fetch_deadline.remaining(), 0.1)),
+                        stream=True
+                    )
+                except requests.exceptions.RequestException as e:
+                    if fetch_deadline.expired:
+                        raise deadline_exceeded() from e
+                    raise
+
+                redirect_url = session.get_redirect_target(http_response)
+                if not allow_redirects or not redirect_url:
+                    break
+
+                # Close the hop without touching its body
+                http_response.close()
+                history.append(http_response)
+                if len(history) > limits['max_redirects']:
+                    raise requests.exceptions.TooManyRedirects(
+                        f"Exceeded {limits['max_redirects']} redirects.", response=http_response
+                    )
+                url = urljoin(http_response.url, redirect_url)
+                method = get_redirect_method(method, http_response.status_code)
+
+            http_response.history = history
+            result['response'] = http_response
+            # The most recently opened connection, i.e. normally the one to the final redirect target
+            result['connection'] = _connection_info.last
+
+            if not read_body:
+                http_response.close()
+                return result
+
+            decoder = None
+            text_parts = []
+            try:
+                # iter_content yields decompressed bytes, so the cap also covers compression bombs
+                for chunk in http_response.iter_content(chunk_size=Config.FETCH_CHUNK_SIZE):
+                    allowed = limits['max_body_bytes'] - result['body_bytes']
+                    if len(chunk) > allowed:
+                        chunk = chunk[:allowed]
+                        result['truncated'] = True
+                        result['truncation_reason'] = 'max_body_bytes'
+
+                    if decoder is None:
+                        result['encoding'] = detect_charset(http_response, chunk)
+                        decoder = codecs.getincrementaldecoder(result['encoding'])(errors='replace')
+
+                    result['body_bytes'] += len(chunk)
+                    text_parts.append(decoder.decode(chunk))
+
+                    if result['truncated']:
+                        break
+                    if fetch_deadline.remaining() <= 0:
+                        result['truncated'] = True
+                        result['truncation_reason'] = 'deadline_seconds'
+                        break
+            except requests.exceptions.RequestException:
+                # A read cut off by the deadline fails mid-body; keep what was read
+                if not fetch_deadline.expired:
+                    raise
+            finally:
+                http_response.close()
+
+            if fetch_deadline.expired and not result['truncated']:
+                result['truncated'] = True
+                result['truncation_reason'] = 'deadline_seconds'
+
+            if decoder is not None:
+                text_parts.append(decoder.decode(b'', final=True))
+            result['text'] = ''.join(text_parts)
+        finally:
+            _connection_info.deadline = None
+
+    return result
+
+
+def get_truncation_details(fetch_result):
+    """
+    Summarises why a fetched body was truncated, for inclusion in API responses.
+    Returns None if the body was read in full.
+    """
+    if not fetch_result['truncated']:
+        return None
+    return {
+        'reason': fetch_result['truncation_reason'],
+        'bytes_read': fetch_result['body_bytes'],
+        'limits': fetch_result['limits']
+    }
@@ -0,0 +1,297 @@
+# header_analysis.py
+
+import re
+from functools import lru_cache
+from config import Config
+
+# Points deducted from a perfect score of 100 for each finding
+SEVERITY_PENALTIES = {
+    'high': 20,
+    'medium': 10,
+    'low': 5,
+    'info': 0
+}
+
+GRADES = [(90, 'A'), (80, 'B'), (70, 'C'), (60, 'D'), (50, 'E')]
+
+HSTS_MIN_MAX_AGE = 31536000 # One year, also the minimum for the preload list
+
+# Precompiled once; every parser below is memoised by the raw header value
+CSP_DIRECTIVE_SPLIT_RE = re.compile(r'\s*;\s*')
+WHITESPACE_RE = re.compile(r'\s+')
+HSTS_MAX_AGE_RE = re.compile(r'max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+HSTS_INCLUDE_SUBDOMAINS_RE = re.compile(r'(?:^|;)\s*includesubdomains\s*(?:;|$)', re.IGNORECASE)
+HSTS_PRELOAD_RE = re.compile(r'(?:^|;)\s*preload\s*(?:;|$)', re.IGNORECASE)
+# requests joins repeated Set-Cookie headers with ", "; split only where a new "name=" starts,
+# so the comma inside "Expires=Wed, 21 Oct 2015 ..." is left alone
+SET_COOKIE_SPLIT_RE = re.compile(r',\s*(?=[^;,\s=]+=)')
+COOKIE_ATTRIBUTE_SPLIT_RE = re.compile(r'\s*;\s*')
+CACHE_CONTROL_SPLIT_RE = re.compile(r'\s*,\s*')
+
+CSP_UNSAFE_SOURCES = {"'unsafe-inline'", "'unsafe-eval'", "'unsafe-hashes'"}
+CSP_WILDCARD_SOURCES = {'*', 'http:', 'https:', 'data:'}
+CSP_FETCH_FALLBACK_DIRECTIVES = ('script-src', 'object-src')
+COMPRESSED_ENCODINGS = {'gzip', 'br', 'deflate', 'zstd', 'compress'}
+
+
+def make_finding(header, severity, message):
+    return {'header': header, 'severity': severity, 'message': message}
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def parse_csp(value):
+    """
+    Parses a Content-Security-Policy into its directives and flags risky sources.
+    """
+    directives = {}
+    for part in CSP_DIRECTIVE_SPLIT_RE.split(value.strip()):
+        if not part:
+            continue
+        tokens = WHITESPACE_RE.split(part)
+        name = tokens[0].lower()
+        # Browsers ignore repeated directives, so only the first one counts
+        directives.setdefault(name, tuple(token for token in tokens[1:]))
+
+    findings = []
+    default_sources = directives.get('default-src')
+    for name in CSP_FETCH_FALLBACK_DIRECTIVES:
+        sources = directives.get(name, default_sources)
+        if sources is None:
+            findings.append(make_finding(
+                'Content-Security-Policy', 'medium', f"Neither '{name}' nor 'default-src' is set."
+            ))
+            continue
+        lowered = {source.lower() for source in sources}
+        for unsafe in sorted(CSP_UNSAFE_SOURCES & lowered):
+            # 'unsafe-inline' is ignored by browsers when a nonce or hash is present
+            if unsafe == "'unsafe-inline'" and any(s.startswith(("'nonce-", "'sha")) for s in lowered):
+                continue
+            findings.append(make_finding('Content-Security-Policy', 'medium', f"'{name}' allows {unsafe}."))
+        if lowered & CSP_WILDCARD_SOURCES:
+            findings.append(make_finding(
+                'Content-Security-Policy', 'medium', f"'{name}' allows content from any host or scheme."
+            ))
+    if 'frame-ancestors' not in directives:
+        findings.append(make_finding(
+            'Content-Security-Policy', 'low', "'frame-ancestors' is not set, so clickjacking protection relies on X-Frame-Options."
+        ))
+    if 'base-uri' not in directives:
+        findings.append(make_finding('Content-Security-Policy', 'low', "'base-uri' is not set."))
+
+    return {
+        'directives': {name: list(sources) for name, sources in directives.items()},
+        'findings': findings
+    }
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def parse_hsts(value):
+    """
+    Parses Strict-Transport-Security and checks it against the preload list requirements.
+    """
+    match = HSTS_MAX_AGE_RE.search(value)
+    max_age = int(match.group(1)) if match else None
+    include_subdomains = HSTS_INCLUDE_SUBDOMAINS_RE.search(value) is not None
+    preload = HSTS_PRELOAD_RE.search(value) is not None
+
+    findings = []
+    if max_age is None:
+        findings.append(make_finding('Strict-Transport-Security', 'high', 'max-age is missing, so the header is ignored.'))
+    elif max_age == 0:
+        findings.append(make_finding('Strict-Transport-Security', 'high', 'max-age=0 turns HSTS off.'))
+    elif max_age < HSTS_MIN_MAX_AGE:
+        findings.append(make_finding(
+            'Strict-Transport-Security', 'low', f'max-age is {max_age} seconds; at least one year is recommended.'
+        ))
+    preload_ready = bool(max_age and max_age >= HSTS_MIN_MAX_AGE and include_subdomains and preload)
+    if preload and not preload_ready:
+        findings.append(make_finding(
+            'Strict-Transport-Security', 'low',
+            'preload is set, but preloading also needs includeSubDomains and a max-age of at least one year.'
+        ))
+
+    return {
+        'max_age': max_age,
+        'include_subdomains': include_subdomains,
+        'preload': preload,
+        'preload_ready': preload_ready,
+        'findings': findings
+    }
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def parse_set_cookie(value):
+    """
+    Parses one or more (comma-joined) Set-Cookie headers and checks their security flags.
+    """
+    cookies = []
+    findings = []
+    for cookie_string in SET_COOKIE_SPLIT_RE.split(value.strip()):
+        parts = COOKIE_ATTRIBUTE_SPLIT_RE.split(cookie_string.strip())
+        name = parts[0].split('=', 1)[0].strip()
+        if not name:
+            continue
+        attributes = {}
+        for attribute in parts[1:]:
+            key, _, attribute_value = attribute.partition('=')
+            attributes[key.strip().lower()] = attribute_value.strip()
+
+        same_site = attributes.get('samesite')
+        cookie = {
+            'name': name,
+            'secure': 'secure' in attributes,
+            'http_only': 'httponly' in attributes,
+            'same_site': same_site.capitalize() if same_site else None
+        }
+        cookies.append(cookie)
+
+        if not cookie['secure']:
+            findings.append(make_finding('Set-Cookie', 'medium', f"Cookie '{name}' is missing the Secure flag."))
+        if not cookie['http_only']:
+            findings.append(make_finding('Set-Cookie', 'low', f"Cookie '{name}' is missing the HttpOnly flag."))
+        if cookie['same_site'] is None:
+            findings.append(make_finding('Set-Cookie', 'low', f"Cookie '{name}' has no SameSite attribute."))
+        elif cookie['same_site'] == 'None' and not cookie['secure']:
+            findings.append(make_finding(
+                'Set-Cookie', 'medium', f"Cookie '{name}' uses SameSite=None without Secure, so browsers reject it."
+            ))
+
+    return {'cookies': cookies, 'findings': findings}
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def parse_cache_control(value):
+    """
+    Parses Cache-Control and works out whether, and for how long, shared caches may store the response.
+    """
+    directives = {}
+    for part in CACHE_CONTROL_SPLIT_RE.split(value.strip()):
+        if not part:
+            continue
+        key, _, directive_value = part.partition('=')
+        directives[key.strip().lower()] = directive_value.strip().strip('"') or True
+
+    def get_seconds(name):
+        value = directives.get(name)
+        if not isinstance(value, str) or not value.isdigit():
+            return None
+        return int(value)
+
+    max_age = get_seconds('max-age')
+    shared_max_age = get_seconds('s-maxage')
+    cacheable = 'no-store' not in directives
+    shared_cacheable = cacheable and 'private' not in directives
+
+    findings = []
+    if 'public' in directives and 'private' in directives:
+        findings.append(make_finding('Cache-Control', 'low', "Both 'public' and 'private' are set."))
+    if cacheable and 'no-cache' not in directives and max_age is None and shared_max_age is None:
+        findings.append(make_finding(
+            'Cache-Control', 'info', 'No max-age is set, so caches fall back to heuristic freshness.'
+        ))
+
+    return {
+        'directives': directives,
+        'cacheable': cacheable,
+        'shared_cacheable': shared_cacheable,
+        'max_age': max_age,
+        's_maxage': shared_max_age,
+        'must_revalidate': 'no-cache' in directives or 'must-revalidate' in directives,
+        'immutable': 'immutable' in directives,
+        'findings': findings
+    }
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def parse_content_encoding(value):
+    """
+    Lists the content codings applied to the response and whether it is compressed.
+    """
+    encodings = [encoding.strip().lower() for encoding in value.split(',') if encoding.strip()]
+    return {
+        'encodings': encodings,
+        'compressed': any(encoding in COMPRESSED_ENCODINGS for encoding in encodings)
+    }
+
+
+@lru_cache(maxsize=Config.HEADER_ANALYSIS_CACHE_SIZE)
+def _analyze(is_https, csp, hsts, set_cookie, cache_control, content_encoding,
+             content_type_options, frame_options, referrer_policy):
+    findings = []
+    analysis = {}
+
+    if csp is not None:
+        analysis['csp'] = parse_csp(csp)
+        findings.extend(analysis['csp']['findings'])
+    else:
+        analysis['csp'] = None
+        findings.append(make_finding('Content-Security-Policy', 'high', 'No Content-Security-Policy header.'))
+
+    if hsts is not None:
+        analysis['hsts'] = parse_hsts(hsts)
+        if is_https:
+            findings.extend(analysis['hsts']['findings'])
+        else:
+            findings.append(make_finding(
+                'Strict-Transport-Security', 'info', 'HSTS sent over plain HTTP is ignored by browsers.'
+            ))
+    else:
+        analysis['hsts'] = None
+        if is_https:
+            findings.append(make_finding('Strict-Transport-Security', 'high', 'No Strict-Transport-Security header.'))
+        else:
+            findings.append(make_finding('Strict-Transport-Security', 'high', 'The site was served over plain HTTP.'))
+
+    if set_cookie is not None:
+        parsed_cookies = parse_set_cookie(set_cookie)
+        analysis['cookies'] = parsed_cookies['cookies']
+        findings.extend(parsed_cookies['findings'])
+    else:
+        analysis['cookies'] = []
+
+    analysis['caching'] = parse_cache_control(cache_control) if cache_control is not None else None
+    if analysis['caching']:
+        findings.extend(analysis['caching']['findings'])
+
+    analysis['compression'] = parse_content_encoding(content_encoding or '')
+    if not analysis['compression']['compressed']:
+        findings.append(make_finding('Content-Encoding', 'info', 'The response is not compressed.'))
+
+    if (content_type_options or '').strip().lower() != 'nosniff':
+        findings.append(make_finding('X-Content-Type-Options', 'medium', "X-Content-Type-Options is not 'nosniff'."))
+    frame_ancestors_set = analysis['csp'] is not None and 'frame-ancestors' in analysis['csp']['directives']
+    if frame_options is None and not frame_ancestors_set:
+        findings.append(make_finding(
+            'X-Frame-Options', 'medium', 'Neither X-Frame-Options nor CSP frame-ancestors is set.'
+        ))
+    if referrer_policy is None:
+        findings.append(make_finding('Referrer-Policy', 'low', 'No Referrer-Policy header.'))
+
+    score = max(0, 100 - sum(SEVERITY_PENALTIES[finding['severity']] for finding in findings))
+    analysis['score'] = score
+    analysis['grade'] = next((grade for minimum, grade in GRADES if score >= minimum), 'F')
+    analysis['findings'] = findings
+    return analysis
+
+
+def analyze_headers(headers, url):
+    """
+    Scores the security and caching headers of a response and lists findings.
+
+    Each header is parsed once per distinct value (see the lru_cache'd parsers
+    above) and the whole analysis is memoised on the relevant header values,
+    so repeat analyses of common header sets are close to free. The result is
+    shared between callers and must not be modified.
+    """
+    lowered = {name.lower(): value for name, value in headers.items()}
+    return _analyze(
+        url.lower().startswith('https://'),
+        lowered.get('content-security-policy'),
+        lowered.get('strict-transport-security'),
+        lowered.get('set-cookie'),
+        lowered.get('cache-control'),
+        lowered.get('content-encoding'),
+        lowered.get('x-content-type-options'),
+        lowered.get('x-frame-options'),
+        lowered.get('referrer-policy')
+    )
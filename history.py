@@ -0,0 +1,261 @@
+# history.py
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config import Config
+from sqlite_pool import SQLiteConnectionPool
+
+# Response headers that change on every request and would hide real changes
+VOLATILE_HEADERS = {
+    'age', 'date', 'expires', 'set-cookie', 'last-modified', 'etag', 'cf-ray', 'nel', 'report-to',
+    'server-timing', 'via', 'x-cache', 'x-cache-hits', 'x-request-id', 'x-amz-request-id',
+    'x-amz-cf-id', 'x-runtime', 'x-served-by', 'x-timer'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    hash TEXT PRIMARY KEY,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES results(hash),
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    snapshots INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS changes_by_target ON changes (kind, target, id);
+"""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def create_schema(connection):
+    connection.executescript(SCHEMA)
+
+
+@contextmanager
+def history_connection():
+    """
+    Lends a connection to the history database from a pool shared by this process's threads.
+    The schema is created once per process, and the pool follows HISTORY_DB_PATH if it changes.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != Config.HISTORY_DB_PATH:
+            _pool = SQLiteConnectionPool(Config.HISTORY_DB_PATH, setup=create_schema)
+        pool = _pool
+    with pool.connection() as connection:
+        yield connection
+
+
+@contextmanager
+def write_transaction(connection):
+    """
+    Runs a block in a transaction that takes the write lock up front (BEGIN IMMEDIATE),
+    so a read-compare-write inside it is atomic across threads and processes.
+    """
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        yield connection
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def sorted_items(items):
+    """
+    Sorts a list of records into a stable order so reordered answers hash the same.
+    """
+    return sorted(items, key=canonical_json)
+
+
+def normalize_dns(data):
+    # TTLs count down in resolver caches, so they are left out
+    records = {}
+    for rtype_str, entries in data.get('records', {}).items():
+        records[rtype_str] = sorted_items([
+            {field: value for field, value in entry.items() if field != 'ttl'} for entry in entries
+        ])
+    return {'domain': data.get('domain'), 'records': records}
+
+
+def normalize_whois(data):
+    # The raw text often embeds the time of the query, so only the parsed fields are kept
+    parsed_data = dict(data.get('parsed_data') or {})
+    for field in ('name_servers', 'emails'):
+        if isinstance(parsed_data.get(field), (list, tuple, set)):
+            parsed_data[field] = sorted(str(value).lower() for value in parsed_data[field])
+    return {
+        'domain': data.get('domain'),
+        'is_registered': data.get('is_registered'),
+        'parsed_data': parsed_data
+    }
+
+
+def normalize_headers(data):
+    headers = {
+        name.lower(): value for name, value in (data.get('headers') or {}).items()
+        if name.lower() not in VOLATILE_HEADERS
+    }
+    return {
+        'url': data.get('url'),
+        'status_code': data.get('status_code'),
+        'headers': headers
+    }
+
+
+NORMALIZERS = {
+    'dns': normalize_dns,
+    'whois': normalize_whois,
+    'header': normalize_headers
+}
+
+
+def get_result_hash(normalized):
+    return hashlib.sha256(canonical_json(normalized).encode('utf-8')).hexdigest()
+
+
+def record_result(kind, target, response):
+    """
+    Records a lookup result in the history.
+
+    The result is normalised (volatile fields dropped, lists sorted) and hashed.
+    Each distinct result is stored once, compressed. A target's history is a
+    list of changes: a result identical to the latest one only bumps that
+    change's last_seen and snapshot count, so unchanged results add no rows.
+    Only the HISTORY_MAX_CHANGES most recent changes per target are kept.
+    Returns the hash.
+    """
+    normalized = NORMALIZERS[kind](response.get('data') or {})
+    result_hash = get_result_hash(normalized)
+    now = time.time()
+
+    with history_connection() as connection, write_transaction(connection):
+        latest = connection.execute(
+            'SELECT id, hash FROM changes WHERE kind = ? AND target = ? ORDER BY id DESC LIMIT 1',
+            (kind, target)
+        ).fetchone()
+        if latest is not None and latest[1] == result_hash:
+            connection.execute(
+                'UPDATE changes SET last_seen = ?, snapshots = snapshots + 1 WHERE id = ?', (now, latest[0])
+            )
+            return result_hash
+
+        exists = connection.execute('SELECT 1 FROM results WHERE hash = ?', (result_hash,)).fetchone()
+        if not exists:
+            payload = zlib.compress(canonical_json(normalized).encode('utf-8'))
+            connection.execute(
+                'INSERT OR IGNORE INTO results (hash, payload) VALUES (?, ?)', (result_hash, payload)
+            )
+        connection.execute(
+            'INSERT INTO changes (kind, target, hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)',
+            (kind, target, result_hash, now, now)
+        )
+        expire_changes(connection, kind, target)
+    return result_hash
+
+
+def expire_changes(connection, kind, target):
+    """
+    Deletes a target's changes beyond the newest HISTORY_MAX_CHANGES, and any
+    stored results no change refers to any more.
+    """
+    expired = connection.execute(
+        'SELECT id, hash FROM changes WHERE kind = ? AND target = ? ORDER BY id DESC LIMIT -1 OFFSET ?',
+        (kind, target, Config.HISTORY_MAX_CHANGES)
+    ).fetchall()
+    if not expired:
+        return
+    connection.executemany('DELETE FROM changes WHERE id = ?', [(change_id,) for change_id, _ in expired])
+    connection.executemany(
+        'DELETE FROM results WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM changes WHERE hash = ?)',
+        [(result_hash, result_hash) for result_hash in {result_hash for _, result_hash in expired}]
+    )
+
+
+def load_result(result_hash):
+    """
+    Returns the normalised result stored under a hash, or None if it is unknown.
+    """
+    with history_connection() as connection:
+        row = connection.execute('SELECT payload FROM results WHERE hash = ?', (result_hash,)).fetchone()
+    if row is None:
+        return None
+    return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+
+def format_change(result_hash, first_seen, last_seen, snapshots):
+    return {
+        'hash': result_hash,
+        'first_seen': datetime.fromtimestamp(first_seen, timezone.utc).isoformat(),
+        'last_seen': datetime.fromtimestamp(last_seen, timezone.utc).isoformat(),
+        'snapshots': snapshots
+    }
+
+
+def get_latest_change(kind, target):
+    """
+    Returns the current result of a target (its most recent change), or None if it has no history.
+    A single indexed row read, for cheap "has it changed since <hash>?" checks.
+    """
+    with history_connection() as connection:
+        row = connection.execute(
+            'SELECT hash, first_seen, last_seen, snapshots FROM changes '
+            'WHERE kind = ? AND target = ? ORDER BY id DESC LIMIT 1',
+            (kind, target)
+        ).fetchone()
+    return format_change(*row) if row else None
+
+
+def get_changes(kind, target, limit=20):
+    """
+    Returns the most recent points at which the result for a target changed, oldest first.
+    """
+    with history_connection() as connection:
+        rows = connection.execute(
+            'SELECT hash, first_seen, last_seen, snapshots FROM changes '
+            'WHERE kind = ? AND target = ? ORDER BY id DESC LIMIT ?',
+            (kind, target, limit)
+        ).fetchall()
+    return [format_change(*row) for row in reversed(rows)]
+
+
+def diff_results(old, new, path=''):
+    """
+    Lists the differences between two normalised results.
+    Dicts are compared key by key; lists are compared as sets of items.
+    """
+    changes = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old) | set(new)):
+            sub_path = f'{path}.{key}' if path else key
+            if key not in old:
+                changes.append({'path': sub_path, 'change': 'added', 'new': new[key]})
+            elif key not in new:
+                changes.append({'path': sub_path, 'change': 'removed', 'old': old[key]})
+            else:
+                changes.extend(diff_results(old[key], new[key], sub_path))
+    elif isinstance(old, list) and isinstance(new, list):
+        old_items = {canonical_json(item): item for item in old}
+        new_items = {canonical_json(item): item for item in new}
+        for key in sorted(old_items.keys() - new_items.keys()):
+            changes.append({'path': path, 'change': 'removed', 'old': old_items[key]})
+        for key in sorted(new_items.keys() - old_items.keys()):
+            changes.append({'path': path, 'change': 'added', 'new': new_items[key]})
+    elif old != new:
+        changes.append({'path': path, 'change': 'changed', 'old': old, 'new': new})
+    return changes
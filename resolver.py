@@ -0,0 +1,243 @@
+# resolver.py
+
+import queue
+import socket
+import threading
+import time
+import dns.exception
+import dns.inet
+import dns.resolver
+from config import Config
+
+_shared_resolver = None
+_shared_resolver_lock = threading.Lock()
+
+
+def get_shared_resolver():
+    """
+    Returns the process-wide dnspython resolver, with an LRU answer cache.
+    Answers are cached for their TTL, so repeated checks of the same host skip the network.
+    """
+    global _shared_resolver
+    with _shared_resolver_lock:
+        if _shared_resolver is None:
+            resolver = dns.resolver.Resolver()
+            resolver.timeout = 5
+            resolver.lifetime = 5
+            resolver.cache = dns.resolver.LRUCache(Config.DNS_CACHE_SIZE)
+            _shared_resolver = resolver
+        return _shared_resolver
+
+
+def get_family_name(family):
+    """
+    Helper function to get a readable name for a socket address family.
+    """
+    return 'IPv6' if family == socket.AF_INET6 else 'IPv4'
+
+
+def lookup_addresses(host, family, events):
+    """
+    Looks up the AAAA or A records of a host with the shared resolver and puts
+    ('resolved', family, addresses, error) on the events queue.
+    """
+    rtype_str = 'AAAA' if family == socket.AF_INET6 else 'A'
+    try:
+        answers = get_shared_resolver().resolve(host, rtype_str)
+        events.put(('resolved', family, [str(rdata) for rdata in answers], None))
+    except dns.exception.DNSException as e: # NXDOMAIN, NoAnswer, Timeout, ...
+        events.put(('resolved', family, [], e))
+
+
+def system_resolve(host):
+    """
+    Resolves a hostname with the system resolver (getaddrinfo), which also reads
+    the hosts file. Returns (family, address) tuples; raises socket.gaierror.
+    """
+    addresses = []
+    for family, _, _, _, sockaddr in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP):
+        if family in (socket.AF_INET6, socket.AF_INET) and (family, sockaddr[0]) not in addresses:
+            addresses.append((family, sockaddr[0]))
+    if not addresses:
+        raise socket.gaierror(socket.EAI_NONAME, f'No IPv4 or IPv6 address found for {host}')
+    return addresses
+
+
+def get_lookup_failure(host, errors):
+    """
+    Returns the socket.gaierror to raise when the DNS gave no address for a host,
+    or None if the system resolver should have the final say.
+
+    Only a definite "no such name" / "no such record" answer falls back to the
+    system resolver: dnspython doesn't read the hosts file, so names like
+    "localhost" need it. Timeouts and server failures mean the DNS itself is
+    unavailable and are reported as a temporary failure (EAI_AGAIN).
+    """
+    lookup_errors = [
+        error for error in errors if not isinstance(error, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer))
+    ]
+    if not lookup_errors:
+        return None
+    failure = socket.gaierror(socket.EAI_AGAIN, f'Temporary failure in name resolution of {host}')
+    failure.__cause__ = lookup_errors[0]
+    return failure
+
+
+def resolve_ptr(address):
+    """
+    Returns the hostnames an IPv4 or IPv6 address points back to (its in-addr.arpa /
+    ip6.arpa PTR records), using the shared caching resolver.
+    An address without PTR records gives an empty list; other DNS errors are raised.
+    """
+    try:
+        answers = get_shared_resolver().resolve_address(address)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return []
+    return [rdata.target.to_text(omit_final_dot=True) for rdata in answers]
+
+
+def _close_late_connections(events, pending):
+    """
+    Drains the attempts that were still running when a winner was picked and closes their sockets.
+    """
+    while pending:
+        event = events.get()
+        if event[0] != 'connect':
+            continue # A late DNS answer
+        pending -= 1
+        sock = event[1]
+        if sock is not None:
+            sock.close()
+
+
+def _close_late_connections_in_background(events, pending):
+    if pending:
+        threading.Thread(target=_close_late_connections, args=(events, pending), daemon=True).start()
+
+
+def happy_eyeballs_connect(host, port, timeout=None, source_address=None, socket_options=None):
+    """
+    Resolves a host and connects to the first reachable address, RFC 8305 style.
+
+    The AAAA and A lookups run concurrently through the shared resolver, and
+    connection attempts start as soon as the first answer arrives (an A answer
+    waits HAPPY_EYEBALLS_RESOLUTION_DELAY for the AAAA one first). Addresses
+    are tried interleaved IPv6-first; a new attempt starts every
+    HAPPY_EYEBALLS_DELAY seconds, or immediately when the previous one fails.
+    A host with broken IPv6 therefore costs one stagger delay instead of a full
+    connect timeout. timeout bounds the whole thing, DNS included.
+
+    Returns (socket, family, address). Raises socket.gaierror if the name can't
+    be resolved, socket.timeout if nothing connects within timeout, otherwise
+    the last connection error.
+    """
+    events = queue.Queue()
+    started = time.monotonic()
+
+    def attempt(family, address):
+        sock = None
+        try:
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            for option in socket_options or []:
+                sock.setsockopt(*option)
+            sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect((address, port))
+            events.put(('connect', sock, family, address, None))
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            events.put(('connect', None, family, address, e))
+
+    def time_left():
+        if timeout is None:
+            return None
+        return max(timeout - (time.monotonic() - started), 0)
+
+    addresses_by_family = {socket.AF_INET6: [], socket.AF_INET: []}
+    lookups_pending = set()
+    lookup_errors = []
+    if dns.inet.is_address(host):
+        addresses_by_family[dns.inet.af_for_address(host)].append(host)
+    else:
+        for family in (socket.AF_INET6, socket.AF_INET):
+            lookups_pending.add(family)
+            threading.Thread(target=lookup_addresses, args=(host, family, events), daemon=True).start()
+
+    next_family = socket.AF_INET6
+    ipv4_wait_until = 0 # End of the resolution delay, while the AAAA answer is still outstanding
+    next_attempt_at = 0
+    attempts_started = 0
+    attempts_pending = 0
+    last_error = None
+
+    def pick_address():
+        nonlocal next_family
+        other_family = socket.AF_INET if next_family == socket.AF_INET6 else socket.AF_INET6
+        for family in (next_family, other_family):
+            if not addresses_by_family[family]:
+                continue
+            if (family == socket.AF_INET and socket.AF_INET6 in lookups_pending
+                    and not attempts_started and time.monotonic() < ipv4_wait_until):
+                continue
+            next_family = socket.AF_INET if family == socket.AF_INET6 else socket.AF_INET6
+            return family, addresses_by_family[family].pop(0)
+        return None
+
+    while True:
+        if time.monotonic() >= next_attempt_at:
+            candidate = pick_address()
+            if candidate is not None:
+                threading.Thread(target=attempt, args=candidate, daemon=True).start()
+                attempts_started += 1
+                attempts_pending += 1
+                next_attempt_at = time.monotonic() + Config.HAPPY_EYEBALLS_DELAY
+
+        has_addresses = any(addresses_by_family.values())
+        if not has_addresses and not lookups_pending and not attempts_pending:
+            break # Every address has been tried
+
+        # Wake up for the next stagger slot or the end of the resolution delay, or on any event
+        wait = None
+        if has_addresses:
+            wake_at = next_attempt_at
+            if not attempts_started and socket.AF_INET6 in lookups_pending:
+                wake_at = max(wake_at, ipv4_wait_until)
+            wait = max(wake_at - time.monotonic(), 0)
+        if time_left() is not None:
+            wait = time_left() if wait is None else min(wait, time_left())
+
+        try:
+            event = events.get(timeout=wait)
+        except queue.Empty:
+            if time_left() == 0:
+                _close_late_connections_in_background(events, attempts_pending)
+                raise socket.timeout(f'Connection to {host} port {port} timed out after {timeout} seconds.')
+            continue
+
+        if event[0] == 'resolved':
+            _, family, addresses, error = event
+            lookups_pending.discard(family)
+            addresses_by_family[family].extend(addresses)
+            if error is not None:
+                lookup_errors.append(error)
+            if family == socket.AF_INET and socket.AF_INET6 in lookups_pending:
+                ipv4_wait_until = time.monotonic() + Config.HAPPY_EYEBALLS_RESOLUTION_DELAY
+            if not lookups_pending and not attempts_started and not any(addresses_by_family.values()):
+                failure = get_lookup_failure(host, lookup_errors)
+                if failure is not None:
+                    raise failure
+                for family, address in system_resolve(host):
+                    addresses_by_family[family].append(address)
+            continue
+
+        _, sock, family, address, error = event
+        attempts_pending -= 1
+        if sock is not None:
+            _close_late_connections_in_background(events, attempts_pending)
+            return sock, family, address
+        last_error = error
+        next_attempt_at = 0 # Start the next attempt right away
+
+    raise last_error
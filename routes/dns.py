@@ -4,50 +4,131 @@ from flask import Blueprint, request, jsonify
 import dns.resolver
 import dns.exception
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from config import Config
+from resolver import resolve_ptr
 from utils import get_record_type_name, create_response
+from cache import cached_lookup
+from errors import (
+    ERROR_INVALID_INPUT, ERROR_NOT_FOUND, classify_exception, error_response, get_cached_failure, remember_failure
+)
 
 dns_bp = Blueprint('dns', __name__)
 
+# Shared pool for concurrent reverse (PTR) lookups
+reverse_dns_executor = ThreadPoolExecutor(max_workers=Config.REVERSE_DNS_MAX_WORKERS, thread_name_prefix='reverse-dns')
+
+# Record types fetched by /dns_lookup.
+# PTR isn't queried here: PTR records live under in-addr.arpa / ip6.arpa, not the
+# forward name, so use ?reverse=1 to look them up for the A/AAAA addresses instead.
+DEFAULT_RECORD_TYPES = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME', 'SOA', 'SRV', 'CAA']
+
+# Basic validation for domain format
+DOMAIN_RE = re.compile(r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9][a-z0-9-]{0,61}[a-z0-9]$", re.IGNORECASE)
+
+def is_valid_domain(domain):
+    """
+    Checks that a string looks like a domain name (e.g. example.com).
+    """
+    return DOMAIN_RE.match(domain) is not None
+
 @dns_bp.route('/dns_lookup', methods=['GET'])
 def dns_lookup():
     """
     Performs various DNS record lookups for a given domain.
+    Successful results are cached for DNS_RESULT_TTL seconds.
+    With ?reverse=1, the A/AAAA addresses found are also resolved back to hostnames.
     """
     domain = request.args.get('domain')
+    reverse = request.args.get('reverse', '').lower() in ('1', 'true', 'yes')
 
     if not domain:
         response, status_code = create_response(
             success=False,
             message='Please provide a domain name.',
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
-    # Basic validation for domain format
-    if not re.match(r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9][a-z0-9-]{0,61}[a-z0-9]$", domain, re.IGNORECASE):
+    if not is_valid_domain(domain):
         response, status_code = create_response(
             success=False,
             message='Invalid domain format. Please enter a valid domain (e.g., example.com).',
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
+    response, status_code = cached_lookup('dns', domain, lookup_dns_records, Config.DNS_RESULT_TTL)
+    if reverse and status_code == 200:
+        response = attach_reverse_dns(response)
+    return jsonify(response), status_code
+
+def attach_reverse_dns(response):
+    """
+    Resolves the PTR records of every A/AAAA address in a lookup result concurrently
+    and adds them to each entry as 'hostnames'.
+    Returns a new response; the (possibly cached) original is left untouched.
+    The whole batch gets REVERSE_DNS_DEADLINE_SECONDS, however busy the shared pool is;
+    addresses not resolved by then are reported in 'errors'.
+    """
+    records = response['data']['records']
+    addresses = {
+        entry['ip'] for rtype_str in ('A', 'AAAA') for entry in records.get(rtype_str, [])
+    }
+    hostnames = {}
+    errors = list(response['errors'])
+
+    deadline = time.monotonic() + Config.REVERSE_DNS_DEADLINE_SECONDS
+    futures = {address: reverse_dns_executor.submit(resolve_ptr, address) for address in sorted(addresses)}
+    for address, future in futures.items():
+        try:
+            hostnames[address] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except (dns.exception.Timeout, FutureTimeoutError):
+            future.cancel() # Don't hold a pool worker for a result nobody will read
+            errors.append(f"Reverse DNS query for {address} timed out.")
+        except Exception as e:
+            errors.append(f"Error querying reverse DNS for {address}: {e}")
+
+    reverse_records = dict(records)
+    for rtype_str in ('A', 'AAAA'):
+        if rtype_str in records:
+            reverse_records[rtype_str] = [
+                {**entry, 'hostnames': hostnames.get(entry['ip'], [])} for entry in records[rtype_str]
+            ]
+    return {
+        **response,
+        'data': {**response['data'], 'records': reverse_records},
+        'errors': errors
+    }
+
+def lookup_dns_records(domain):
+    """
+    Fetches all supported record types for an already validated domain.
+    Returns a (response, status_code) tuple built by create_response.
+    """
+    # Domains that failed moments ago fail fast with the same error
+    cached_error = get_cached_failure('dns', domain)
+    if cached_error:
+        return error_response(
+            cached_error,
+            data={'domain': domain, 'records': {}},
+            cached=True
+        )
+
     all_records = {}
     found_any_record = False
     errors = []
+    domain_error = None # Set when the domain itself doesn't exist or can't be queried
 
     try:
-        # Define the DNS record types you want to fetch
-        record_types = [
-            'A', 'AAAA', 'MX', 'NS', 'TXT', 'CNAME', 'SOA', 'SRV', 'PTR', 'CAA'
-        ]
-
         resolver = dns.resolver.Resolver()
         resolver.timeout = 5
         resolver.lifetime = 5
 
-        for rtype_str in record_types:
+        for rtype_str in DEFAULT_RECORD_TYPES:
             try:
                 answers = resolver.resolve(domain, rtype_str)
                 formatted_records = []
@@ -83,8 +164,6 @@ def dns_lookup():
                         formatted_entry['weight'] = rdata.weight
                         formatted_entry['port'] = rdata.port
                         formatted_entry['target'] = rdata.target.to_text(omit_final_dot=True)
-                    elif rtype_str == 'PTR':
-                        formatted_entry['target'] = rdata.target.to_text(omit_final_dot=True)
                     elif rtype_str == 'CAA':
                         formatted_entry['flags'] = rdata.flags
                         formatted_entry['tag'] = rdata.tag.decode('utf-8')
@@ -98,25 +177,36 @@ def dns_lookup():
 
             except dns.resolver.NoAnswer:
                 pass # No records of this type found
-            except dns.resolver.NXDOMAIN:
-                # This means the domain itself does not exist.
-                # We can break early or let it collect other errors.
-                # For now, we'll let it try other types and report overall.
-                pass
-            except dns.exception.Timeout:
+            except dns.resolver.NXDOMAIN as e:
+                # The domain itself does not exist, so every other type would fail the same way
+                domain_error = classify_exception(e)
+                break
+            except dns.exception.Timeout as e:
                 errors.append(f"DNS query for {rtype_str} timed out.")
+                domain_error = classify_exception(e)
             except Exception as e:
                 errors.append(f"Error querying {rtype_str} records: {e}")
 
-        if not found_any_record:
-            if not errors: # If no records and no specific errors, it's likely NXDOMAIN or truly no records
+        if not found_any_record and domain_error is not None:
+            # NXDOMAIN or timeouts: remember them so repeat lookups don't wait again
+            remember_failure('dns', domain, domain_error)
+            errors.append(domain_error.message)
+            response, status_code = error_response(
+                domain_error,
+                message='No DNS records found or domain does not exist.',
+                data={'domain': domain, 'records': {}},
+                errors=errors
+            )
+        elif not found_any_record:
+            if not errors: # If no records and no specific errors, the domain truly has no records
                 errors.append('No DNS records found for this domain or domain does not exist. Please check the spelling.')
             response, status_code = create_response(
                 success=False,
                 message='No DNS records found or domain does not exist.',
                 data={'domain': domain, 'records': {}},
                 errors=errors,
-                status_code=404 # Use 404 if domain doesn't exist or no records
+                status_code=404, # Use 404 if domain doesn't exist or no records
+                error_code=ERROR_NOT_FOUND
             )
         else:
             response, status_code = create_response(
@@ -128,12 +218,8 @@ def dns_lookup():
             )
 
     except Exception as e:
-        errors.append(f'An unexpected error occurred: {e}')
-        response, status_code = create_response(
-            success=False,
-            message=f'An unexpected error occurred: {e}',
-            errors=errors,
-            status_code=500
-        )
+        error = classify_exception(e)
+        errors.append(error.message)
+        response, status_code = error_response(error, errors=errors)
 
-    return jsonify(response), status_code
\ No newline at end of file
+    return response, status_code
@@ -7,6 +7,8 @@ from urllib.parse import urlparse
 import re
 from config import Config
 from utils import resolve_url, create_response
+from fetcher import bounded_fetch, get_truncation_details
+from errors import ERROR_INVALID_INPUT, classify_exception, error_response, get_cached_failure, get_origin, remember_failure
 
 favicon_bp = Blueprint('favicon', __name__)
 
@@ -22,7 +24,8 @@ def favicon_checker():
             success=False,
             message='URL parameter is missing.',
             errors=['URL parameter is missing.'],
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
@@ -36,9 +39,25 @@ def favicon_checker():
         'manifest': None,
         'hasFavicon': False,
         'hasManifest': False,
+        'resolved_address': None,
+        'address_family': None,
         'errors': []
     }
 
+    # Hosts that failed moments ago fail fast with the same error
+    origin = get_origin(target_url)
+    cached_error = get_cached_failure('http', origin)
+    if cached_error:
+        response_data['errors'].append(cached_error.message)
+        response, status_code = error_response(
+            cached_error,
+            message='Could not fetch content from the URL (recent failure).',
+            data=response_data,
+            errors=response_data['errors'],
+            cached=True
+        )
+        return jsonify(response), status_code
+
     try:
         # Fetch HTML content
         try:
@@ -46,19 +65,31 @@ def favicon_checker():
             req_headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
             }
-            html_response = requests.get(target_url, headers=req_headers, allow_redirects=True, timeout=10)
+            # Streamed and size-capped so a huge or hostile page can't exhaust worker memory
+            fetch_result = bounded_fetch(target_url, headers=req_headers, timeout=10)
+            html_response = fetch_result['response']
             html_response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-            html_content = html_response.text
+            html_content = fetch_result['text']
+
+            # Address and family that won the connection race
+            if fetch_result['connection']:
+                response_data['resolved_address'] = fetch_result['connection']['resolved_address']
+                response_data['address_family'] = fetch_result['connection']['address_family']
+
+            truncation = get_truncation_details(fetch_result)
+            if truncation:
+                response_data['truncation'] = truncation
 
         except requests.exceptions.RequestException as e:
-            error_message = f'Could not fetch content from the URL: {e}'
-            response_data['errors'].append(error_message)
-            response, status_code = create_response(
-                success=False,
+            # Timeouts, DNS failures, refused connections, TLS errors, ... (see errors.py)
+            error = classify_exception(e)
+            remember_failure('http', origin, error)
+            response_data['errors'].append(f'Could not fetch content from the URL: {error.message}')
+            response, status_code = error_response(
+                error,
                 message='Could not fetch content from the URL. It might be down or blocking requests.',
                 data=response_data,
-                errors=response_data['errors'],
-                status_code=500
+                errors=response_data['errors']
             )
             return jsonify(response), status_code
 
@@ -98,7 +129,10 @@ def favicon_checker():
 
             try:
                 # Use HEAD request to check for existence without downloading content
-                manifest_head_response = requests.head(site_webmanifest_url, headers=req_headers, timeout=5)
+                manifest_head_response = bounded_fetch(
+                    site_webmanifest_url, method='HEAD', headers=req_headers, timeout=5,
+                    read_body=False, allow_redirects=False
+                )['response']
                 if manifest_head_response.status_code >= 200 and manifest_head_response.status_code < 300:
                     manifest_url = site_webmanifest_url
                     manifest_found = True
@@ -121,12 +155,11 @@ def favicon_checker():
         return jsonify(response), status_code
 
     except Exception as e:
-        response_data['errors'].append(f'An unexpected error occurred: {e}')
-        response, status_code = create_response(
-            success=False,
-            message=f'An unexpected error occurred: {e}',
+        error = classify_exception(e)
+        response_data['errors'].append(error.message)
+        response, status_code = error_response(
+            error,
             data=response_data,
-            errors=response_data['errors'],
-            status_code=500
+            errors=response_data['errors']
         )
         return jsonify(response), status_code
\ No newline at end of file
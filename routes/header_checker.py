@@ -1,12 +1,16 @@
 # routes/header_checker.py
 
 from flask import Blueprint, request, jsonify
-import requests
 from urllib.parse import urlparse, urlunparse
 import re
 
+from config import Config
 # Assuming 'create_response' is imported from 'utils'
 from utils import create_response
+from fetcher import bounded_fetch
+from header_analysis import analyze_headers
+from cache import cached_lookup
+from errors import ERROR_INVALID_INPUT, classify_exception, error_response, get_cached_failure, get_origin, remember_failure
 
 header_checker_bp = Blueprint('header_checker', __name__)
 
@@ -40,10 +44,29 @@ def get_status_message(status_code):
     """
     return STATUS_MESSAGES.get(status_code, 'Unknown Status')
 
+def normalize_url(target_url):
+    """
+    Adds a default http:// scheme to bare URLs and checks the result looks like a URL.
+    Returns the normalized URL, or None if it is not a valid URL.
+    """
+    # We'll use a regex check similar to favicon.py to allow non-schemed URLs
+    if not re.match(r"^(?:f|ht)tps?://", target_url):
+        target_url = "http://" + target_url
+
+    # We'll perform a simple check to ensure it looks like a URL before attempting the request
+    try:
+        parsed = urlparse(target_url)
+        if not all([parsed.scheme, parsed.netloc]):
+            raise ValueError("Invalid structure")
+    except ValueError:
+        return None
+    return target_url
+
 @header_checker_bp.route('/header_checker', methods=['GET'])
 def header_checker():
     """
     Fetches HTTP headers for a given URL using a HEAD request.
+    Successful results are cached for HEADER_RESULT_TTL seconds.
     """
     target_url = request.args.get('url')
 
@@ -53,66 +76,84 @@ def header_checker():
             success=False,
             message='URL parameter is missing.',
             errors=['No URL provided in the request.'],
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
     # 2. Basic URL Validation (PHP: filter_var($url, FILTER_VALIDATE_URL))
-    # We'll use a regex check similar to favicon.py to allow non-schemed URLs
-    if not re.match(r"^(?:f|ht)tps?://", target_url):
-        target_url = "http://" + target_url
-    
-    # We'll perform a simple check to ensure it looks like a URL before attempting the request
-    try:
-        parsed = urlparse(target_url)
-        if not all([parsed.scheme, parsed.netloc]):
-            raise ValueError("Invalid structure")
-    except ValueError:
+    target_url = normalize_url(target_url)
+    if target_url is None:
         response, status_code = create_response(
             success=False,
             message='Invalid URL format.',
             errors=['The provided URL does not appear to be a valid URL.'],
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
+    response, status_code = cached_lookup('header', target_url, lookup_headers, Config.HEADER_RESULT_TTL)
+    return jsonify(response), status_code
+
+def lookup_headers(target_url):
+    """
+    Fetches the response headers for an already normalized URL.
+    Returns a (response, status_code) tuple built by create_response.
+    """
     response_data = {
         'url': target_url,
         'status_code': None,
         'status_message': 'Request Failed',
         'headers': {},
+        'resolved_address': None,
+        'address_family': None,
+        'analysis': None,
         'errors': []
     }
     
+    # Hosts that failed moments ago fail fast with the same error
+    origin = get_origin(target_url)
+    cached_error = get_cached_failure('http', origin)
+    if cached_error:
+        response_data['errors'].append(cached_error.message)
+        return error_response(
+            cached_error,
+            message='Failed to fetch URL headers (recent failure).',
+            data=response_data,
+            errors=response_data['errors'],
+            cached=True
+        )
+
     # Set headers similar to favicon.py for consistency
     req_headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36'
     }
 
     try:
-        # Use requests.head() to mimic PHP's CURLOPT_NOBODY, but follow redirects
-        # requests automatically handles redirects (CURLOPT_FOLLOWLOCATION)
+        # Use a HEAD request to mimic PHP's CURLOPT_NOBODY, but follow redirects
+        # bounded_fetch handles redirects (CURLOPT_FOLLOWLOCATION) within the configured caps
         # requests verifies SSL by default (CURLOPT_SSL_VERIFYPEER/HOST)
-        http_response = requests.head(
-            target_url, 
-            headers=req_headers, 
-            allow_redirects=True, 
-            timeout=10 # CURLOPT_TIMEOUT
+        fetch_result = bounded_fetch(
+            target_url,
+            method='HEAD',
+            headers=req_headers,
+            timeout=10, # CURLOPT_TIMEOUT
+            read_body=False
         )
+        http_response = fetch_result['response']
         
-        # requests.head() is often blocked, so fall back to requests.get() 
-        # but stop downloading content immediately (stream=True)
+        # HEAD is often blocked, so fall back to GET but close the connection
+        # as soon as the headers arrive (no body is downloaded)
         if http_response.status_code >= 400:
-             http_response = requests.get(
-                target_url, 
-                headers=req_headers, 
-                allow_redirects=True, 
+             fetch_result = bounded_fetch(
+                target_url,
+                method='GET',
+                headers=req_headers,
                 timeout=10,
-                stream=True
+                read_body=False
             )
-             # Important: Stop the download immediately
-             if http_response.raw:
-                 http_response.raw.close()
+             http_response = fetch_result['response']
             
 
         # Get final status code and message
@@ -123,10 +164,18 @@ def header_checker():
         response_data['headers'] = dict(http_response.headers)
         response_data['status_code'] = final_status_code
         response_data['status_message'] = final_status_message
+
+        # Address and family that won the connection race
+        if fetch_result['connection']:
+            response_data['resolved_address'] = fetch_result['connection']['resolved_address']
+            response_data['address_family'] = fetch_result['connection']['address_family']
         
         # If there were redirects, get the final URL
         if http_response.history:
             response_data['url'] = http_response.url
+
+        # Security and caching header score and findings
+        response_data['analysis'] = analyze_headers(response_data['headers'], response_data['url'])
         
         response, status_code = create_response(
             success=True,
@@ -134,40 +183,16 @@ def header_checker():
             data=response_data,
             status_code=200
         )
-        return jsonify(response), status_code
-
-    except requests.exceptions.Timeout as e:
-        error_message = f'Request timed out after 10 seconds.'
-        response_data['errors'].append(error_message)
-        response, status_code = create_response(
-            success=False,
-            message='Failed to fetch URL headers: Timeout.',
-            data=response_data,
-            errors=response_data['errors'],
-            status_code=500
-        )
-        return jsonify(response), status_code
-        
-    except requests.exceptions.RequestException as e:
-        error_message = f'Failed to connect or resolve URL: {e}'
-        response_data['errors'].append(error_message)
-        response, status_code = create_response(
-            success=False,
-            message='Failed to fetch URL headers.',
-            data=response_data,
-            errors=response_data['errors'],
-            status_code=500
-        )
-        return jsonify(response), status_code
+        return response, status_code
 
     except Exception as e:
-        error_message = f'An unexpected error occurred: {e}'
-        response_data['errors'].append(error_message)
-        response, status_code = create_response(
-            success=False,
-            message=error_message,
+        # Timeouts, DNS failures, refused connections, TLS errors, ... (see errors.py)
+        error = classify_exception(e)
+        remember_failure('http', origin, error)
+        response_data['errors'].append(error.message)
+        return error_response(
+            error,
+            message='Failed to fetch URL headers.',
             data=response_data,
-            errors=response_data['errors'],
-            status_code=500
+            errors=response_data['errors']
         )
-        return jsonify(response), status_code
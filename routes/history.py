@@ -0,0 +1,116 @@
+# routes/history.py
+
+import sqlite3
+from flask import Blueprint, request, jsonify
+from utils import create_response
+from errors import ERROR_INVALID_INPUT, ERROR_NOT_FOUND, ERROR_INTERNAL
+from watcher import normalize_target
+from history import get_changes, get_latest_change, load_result, diff_results
+
+history_bp = Blueprint('history', __name__)
+
+@history_bp.route('/history', methods=['GET'])
+def history():
+    """
+    Returns how the result of a DNS, WHOIS or header lookup has changed over time.
+
+    Pass the last hash you saw as 'since' to check for changes cheaply: if the
+    result is unchanged, only the hash comes back; otherwise you get a diff
+    from that result to the latest one. Without 'since', the most recent
+    changes are listed, each with a diff against the one before it.
+    """
+    kind = request.args.get('kind', '').strip().lower()
+    target, error = normalize_target(kind, request.args.get('target', '').strip())
+    if error:
+        response, status_code = create_response(
+            success=False,
+            message=error,
+            errors=[error],
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
+        )
+        return jsonify(response), status_code
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+
+    since = request.args.get('since')
+    try:
+        response, status_code = get_history_response(kind, target, since, limit)
+    except sqlite3.Error as e:
+        # E.g. the database stayed locked past the busy timeout
+        response, status_code = create_response(
+            success=False,
+            message='The history store is temporarily unavailable. Please try again.',
+            data={'kind': kind, 'target': target},
+            errors=[f'History store error: {e}'],
+            status_code=503,
+            error_code=ERROR_INTERNAL
+        )
+    return jsonify(response), status_code
+
+def get_history_response(kind, target, since, limit):
+    """
+    Builds the /history response for a validated kind and target.
+    Returns a (response, status_code) tuple built by create_response.
+    """
+    # With 'since' only the latest change is read, so the common "unchanged" answer is one row lookup
+    if since:
+        latest = get_latest_change(kind, target)
+        changes = [latest] if latest else []
+    else:
+        changes = get_changes(kind, target, limit=limit)
+
+    if not changes:
+        response, status_code = create_response(
+            success=False,
+            message=f"No history recorded for {kind} lookups of '{target}'.",
+            data={'kind': kind, 'target': target},
+            errors=['No history found.'],
+            status_code=404,
+            error_code=ERROR_NOT_FOUND
+        )
+        return response, status_code
+
+    latest_hash = changes[-1]['hash']
+    data = {
+        'kind': kind,
+        'target': target,
+        'latest_hash': latest_hash,
+        'last_seen': changes[-1]['last_seen']
+    }
+
+    if since:
+        data['changed'] = since != latest_hash
+        if data['changed']:
+            old_result = load_result(since)
+            if old_result is None:
+                response, status_code = create_response(
+                    success=False,
+                    message=f"Unknown hash '{since}'.",
+                    data=data,
+                    errors=['Unknown hash.'],
+                    status_code=404,
+                    error_code=ERROR_NOT_FOUND
+                )
+                return response, status_code
+            data['diff'] = diff_results(old_result, load_result(latest_hash))
+        message = 'Result has changed.' if data['changed'] else 'Result is unchanged.'
+    else:
+        previous_result = None
+        for change in changes:
+            result = load_result(change['hash'])
+            if previous_result is not None:
+                change['diff'] = diff_results(previous_result, result)
+            previous_result = result
+        data['changes'] = changes
+        message = f'{len(changes)} distinct result(s) found.'
+
+    response, status_code = create_response(
+        success=True,
+        message=message,
+        data=data
+    )
+    return response, status_code
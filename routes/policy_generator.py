@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 import re
 from datetime import datetime
 from utils import create_response
+from errors import ERROR_INVALID_INPUT
 
 policy_generator_bp = Blueprint('policy_generator', __name__)
 
@@ -72,7 +73,8 @@ def privacy_policy_generator():
             success=False,
             message='Input validation failed.',
             errors=errors,
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
@@ -0,0 +1,96 @@
+# routes/watchlist.py
+
+from flask import Blueprint, request, jsonify
+from utils import create_response
+from errors import ERROR_INVALID_INPUT, ERROR_NOT_FOUND
+from watcher import watch_scheduler, normalize_target
+
+watchlist_bp = Blueprint('watchlist', __name__)
+
+def get_watch_params():
+    """
+    Reads 'kind' and 'target' from the JSON body, form data or query string.
+    Returns (kind, target, None) or (None, None, error_message).
+    """
+    data = request.get_json(silent=True) or request.form or request.args
+    if not isinstance(data, dict):
+        return None, None, 'The request body must be a JSON object.'
+    kind, target = data.get('kind', ''), data.get('target', '')
+    if not isinstance(kind, str) or not isinstance(target, str):
+        return None, None, "'kind' and 'target' must be strings."
+    return kind.strip().lower(), target.strip(), None
+
+@watchlist_bp.route('/watchlist', methods=['GET'])
+def list_watched():
+    """
+    Lists all watched lookups with their request counts and cache status.
+    """
+    entries = watch_scheduler.list_entries()
+    response, status_code = create_response(
+        success=True,
+        message=f'{len(entries)} watched lookup(s).',
+        data={'entries': entries}
+    )
+    return jsonify(response), status_code
+
+@watchlist_bp.route('/watchlist', methods=['POST'])
+def add_watched():
+    """
+    Adds a DNS, WHOIS or header lookup to the watch list so it is kept warm in the cache.
+    """
+    kind, target, error = get_watch_params()
+    if not error:
+        target, error = normalize_target(kind, target)
+    if error:
+        response, status_code = create_response(
+            success=False,
+            message=error,
+            errors=[error],
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
+        )
+        return jsonify(response), status_code
+
+    entry = watch_scheduler.add(kind, target)
+    response, status_code = create_response(
+        success=True,
+        message=f"Now watching {kind} lookups for '{target}'.",
+        data={'entry': entry},
+        status_code=201
+    )
+    return jsonify(response), status_code
+
+@watchlist_bp.route('/watchlist', methods=['DELETE'])
+def remove_watched():
+    """
+    Removes a lookup from the watch list.
+    """
+    kind, target, error = get_watch_params()
+    if not error:
+        target, error = normalize_target(kind, target)
+    if error:
+        response, status_code = create_response(
+            success=False,
+            message=error,
+            errors=[error],
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
+        )
+        return jsonify(response), status_code
+
+    if not watch_scheduler.remove(kind, target):
+        response, status_code = create_response(
+            success=False,
+            message=f"No {kind} lookup for '{target}' is being watched.",
+            errors=['Not watched.'],
+            status_code=404,
+            error_code=ERROR_NOT_FOUND
+        )
+        return jsonify(response), status_code
+
+    response, status_code = create_response(
+        success=True,
+        message=f"Stopped watching {kind} lookups for '{target}'.",
+        data={'kind': kind, 'target': target}
+    )
+    return jsonify(response), status_code
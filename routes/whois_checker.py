@@ -5,15 +5,32 @@ import re
 import whois # The python-whois library
 from whois.parser import PywhoisError
 
+from config import Config
 # Assuming 'create_response' is imported from 'utils'
 from utils import create_response
+from cache import cached_lookup
+from errors import (
+    ERROR_INVALID_INPUT, ERROR_NOT_FOUND, ERROR_INTERNAL, UpstreamError,
+    classify_exception, error_response, get_cached_failure, remember_failure
+)
 
 whois_checker_bp = Blueprint('whois_checker', __name__)
 
+# Simplified regex to match PHP's intent.
+# The library handles most TLD rules, but we'll keep the basic check.
+DOMAIN_RE = re.compile(r'^([a-z0-9-]+\.)+[a-z]{2,63}$', re.IGNORECASE)
+
+def is_valid_domain(domain_name):
+    """
+    Checks that a string looks like a registrable domain name (e.g. example.com).
+    """
+    return DOMAIN_RE.match(domain_name) is not None
+
 @whois_checker_bp.route('/whois_checker', methods=['GET'])
 def whois_checker():
     """
     Performs a WHOIS lookup for a given domain name using the python-whois library.
+    Successful results are cached for WHOIS_RESULT_TTL seconds.
     """
     domain_name = request.args.get('domain')
 
@@ -31,22 +48,44 @@ def whois_checker():
             message='Please provide a domain name.',
             data=response_data,
             errors=['Domain parameter is missing.'],
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
-    # 2. Basic Domain Validation (Simplified regex to match PHP's intent)
-    # The library handles most TLD rules, but we'll keep the basic check.
-    if not re.match(r'^([a-z0-9-]+\.)+[a-z]{2,63}$', domain_name, re.IGNORECASE):
+    # 2. Basic Domain Validation
+    if not is_valid_domain(domain_name):
         response, status_code = create_response(
             success=False,
             message='Invalid domain format. Please enter a valid domain (e.g., example.com).',
             data=response_data,
             errors=['Invalid domain format.'],
-            status_code=400
+            status_code=400,
+            error_code=ERROR_INVALID_INPUT
         )
         return jsonify(response), status_code
 
+    response, status_code = cached_lookup('whois', domain_name, lookup_whois, Config.WHOIS_RESULT_TTL)
+    return jsonify(response), status_code
+
+def lookup_whois(domain_name):
+    """
+    Runs the WHOIS query for an already validated domain name.
+    Returns a (response, status_code) tuple built by create_response.
+    """
+    response_data = {
+        'domain': domain_name,
+        'whois_raw': None,
+        'is_registered': False,
+        'parsed_data': {}
+    }
+
+    # Domains whose WHOIS query failed moments ago fail fast with the same error
+    cached_error = get_cached_failure('whois', domain_name)
+    if cached_error:
+        response_data['errors'] = [cached_error.message]
+        return error_response(cached_error, data=response_data, errors=response_data['errors'], cached=True)
+
     try:
         # The whois library handles server mapping, connection, and parsing automatically.
         # It raises PywhoisError for "not found" or connection issues.
@@ -82,7 +121,7 @@ def whois_checker():
             data=response_data,
             status_code=200
         )
-        return jsonify(response), status_code
+        return response, status_code
 
     except PywhoisError as e:
         # This typically catches connection errors, lookup errors, or specific "not found" messages.
@@ -94,31 +133,29 @@ def whois_checker():
 
         if is_not_registered:
             message = f"No WHOIS information found for '{domain_name}'. It is likely unregistered or the WHOIS server returned an error."
-            success = False
-        else:
-            message = f"WHOIS query failed due to a server or connection error: {str(e)}"
-            success = False
+            response_data['errors'] = [message]
+            response, status_code = create_response(
+                success=False,
+                message=message,
+                data=response_data,
+                errors=response_data['errors'],
+                status_code=404,
+                error_code=ERROR_NOT_FOUND
+            )
+            return response, status_code
 
+        # Timeouts, refused connections, rate limiting, ... (see errors.py)
+        error = classify_exception(e)
+        if error.code == ERROR_INTERNAL:
+            error = UpstreamError(error_message)
+        remember_failure('whois', domain_name, error)
+        message = f"WHOIS query failed due to a server or connection error: {str(e)}"
         response_data['errors'] = [message]
-        
-        response, status_code = create_response(
-            success=success,
-            message=message,
-            data=response_data,
-            errors=response_data['errors'],
-            status_code=500
-        )
-        return jsonify(response), status_code
+        return error_response(error, message=message, data=response_data, errors=response_data['errors'])
 
     except Exception as e:
-        error_message = f'An unexpected error occurred: {e}'
-        response_data['errors'] = [error_message]
-        
-        response, status_code = create_response(
-            success=False,
-            message=error_message,
-            data=response_data,
-            errors=response_data['errors'],
-            status_code=500
-        )
-        return jsonify(response), status_code
+        # Socket errors from the WHOIS connection end up here too
+        error = classify_exception(e)
+        remember_failure('whois', domain_name, error)
+        response_data['errors'] = [error.message]
+        return error_response(error, data=response_data, errors=response_data['errors'])
@@ -0,0 +1,68 @@
+# sqlite_pool.py
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteConnectionPool:
+    """
+    Connections to one local SQLite database, shared by the threads of a process.
+
+    The threaded development server runs every request in a new thread, so
+    per-thread connections would be opened, and the schema checked, on every
+    request. Here a connection is lent to one thread at a time and reused
+    afterwards, and setup(connection) (e.g. creating tables) runs once per
+    process. After a fork the child starts with an empty pool, so processes
+    never share a connection.
+    """
+
+    def __init__(self, path, setup=None, timeout=10):
+        self.path = path
+        self.setup = setup
+        self.timeout = timeout
+        self._idle = []
+        self._pid = os.getpid()
+        self._ready = False
+        self._lock = threading.Lock()
+        self._setup_lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """
+        Lends a connection in autocommit mode; open transactions explicitly with BEGIN.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = []
+                self._pid = os.getpid()
+                self._ready = False
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback() # Never hand out a connection with a transaction left open
+            with self._lock:
+                if self._pid == os.getpid():
+                    self._idle.append(connection)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        try:
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with self._setup_lock:
+                if not self._ready:
+                    # WAL mode is stored in the database file, so once per process is plenty
+                    connection.execute('PRAGMA journal_mode=WAL')
+                    if self.setup is not None:
+                        self.setup(connection)
+                    self._ready = True
+        except BaseException:
+            connection.close()
+            raise
+        return connection
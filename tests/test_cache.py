@@ -0,0 +1,98 @@
+# tests/test_cache.py
+
+import sqlite3
+import time
+
+import pytest
+
+import cache
+from cache import SQLiteCache, TTLCache, deserialize, serialize
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    shared = SQLiteCache(str(tmp_path / 'cache.sqlite3'), 'results', max_entries=3, track_access=False)
+    return shared
+
+
+def set_slowly(target_cache, key, value, ttl):
+    target_cache.set(key, value, ttl)
+    time.sleep(0.01) # Distinct access times
+
+
+def test_serialize_round_trip():
+    small = ({'success': True, 'data': {'domain': 'example.com'}}, 200)
+    large = ({'data': {'txt': 'v=spf1 -all ' * 100}}, 200)
+    assert deserialize(serialize(small)) == small
+    assert deserialize(serialize(large)) == large
+    assert len(serialize(large)) < 200 # Compressed
+
+
+def test_sqlite_cache_get_set_and_expiry(shared_cache):
+    shared_cache.set('dns:example.com', ({'success': True}, 200), 300)
+    shared_cache.set('dns:expired.com', ({'success': True}, 200), -1)
+
+    assert shared_cache.get('dns:example.com') == ({'success': True}, 200)
+    assert shared_cache.get('dns:expired.com') is None
+    assert shared_cache.get_expiry('dns:example.com') > time.time()
+    shared_cache.delete('dns:example.com')
+    assert shared_cache.get('dns:example.com') is None
+
+
+@pytest.mark.parametrize('target_cache', ['memory', 'sqlite'])
+def test_least_recently_used_entry_is_evicted(target_cache, shared_cache):
+    if target_cache == 'memory':
+        target_cache = TTLCache(max_entries=3, track_access=False)
+    else:
+        target_cache = shared_cache
+
+    set_slowly(target_cache, 'dns:hot.com', 'hot', 300)
+    set_slowly(target_cache, 'whois:cold.com', 'cold', 6 * 60 * 60)
+    set_slowly(target_cache, 'dns:warm.com', 'warm', 300)
+    target_cache.get('dns:hot.com')
+    time.sleep(0.01)
+    set_slowly(target_cache, 'dns:new.com', 'new', 300)
+
+    # The long-lived but unused entry goes, not the one closest to expiry
+    assert target_cache.get('whois:cold.com') is None
+    assert target_cache.get('dns:hot.com') == 'hot'
+    assert target_cache.get('dns:new.com') == 'new'
+
+
+def test_sqlite_cache_never_exceeds_max_entries(shared_cache):
+    for index in range(50):
+        shared_cache.set(f'dns:domain{index}.com', index, 300)
+        with shared_cache._pool.connection() as connection:
+            count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        assert count <= 3
+
+
+def test_hits_do_not_write(shared_cache):
+    shared_cache.set('dns:example.com', 'value', 300)
+    with shared_cache._pool.connection() as connection:
+        connection.execute('BEGIN IMMEDIATE') # Another writer holds the lock
+        started = time.monotonic()
+        assert shared_cache.get('dns:example.com') == 'value'
+        assert time.monotonic() - started < 1
+        connection.execute('ROLLBACK')
+
+
+def test_table_has_rowids(shared_cache):
+    shared_cache.set('dns:example.com', 'value', 300)
+    with shared_cache._pool.connection() as connection:
+        sql = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'results'").fetchone()[0]
+    assert 'WITHOUT ROWID' not in sql.upper()
+
+
+def test_unusable_shared_cache_is_a_miss(shared_cache, monkeypatch):
+    def locked(connection):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(shared_cache._pool, 'setup', locked)
+    monkeypatch.setattr(cache, 'result_cache', shared_cache)
+    monkeypatch.setattr(cache.Config, 'HISTORY_ENABLED', False)
+
+    assert shared_cache.get('dns:example.com') is None
+    shared_cache.set('dns:example.com', 'value', 300)
+    lookup = lambda target: ({'success': True, 'data': {'domain': target}}, 200)
+    assert cache.cached_lookup('dns', 'example.com', lookup, 300) == lookup('example.com')
@@ -0,0 +1,98 @@
+# tests/test_dns.py
+
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dns.exception
+import dns.resolver
+import pytest
+
+import routes.dns
+from config import Config
+from routes.dns import DEFAULT_RECORD_TYPES, attach_reverse_dns, lookup_dns_records
+from utils import create_response
+
+PTR_RECORDS = {
+    '192.0.2.1': ['host1.example.com'],
+    '2001:db8::1': ['host6.example.com'],
+    '192.0.2.2': [],
+}
+
+
+def fake_resolve_ptr(address):
+    if address == '192.0.2.9':
+        raise dns.exception.Timeout()
+    if address == '192.0.2.10':
+        raise dns.resolver.NoNameservers()
+    if address == '192.0.2.11':
+        time.sleep(2)
+    return PTR_RECORDS[address]
+
+
+def dns_response(addresses):
+    records = {
+        'A': [{'host': 'example.com', 'type': 'A', 'ttl': 300, 'ip': ip} for ip in addresses if ':' not in ip],
+        'AAAA': [{'host': 'example.com', 'type': 'AAAA', 'ttl': 300, 'ip': ip} for ip in addresses if ':' in ip],
+        'MX': [{'host': 'example.com', 'type': 'MX', 'ttl': 300, 'pri': 10, 'target': 'mail.example.com'}]
+    }
+    response, _ = create_response(
+        success=True, message='DNS records fetched successfully.',
+        data={'domain': 'example.com', 'records': records}, errors=[]
+    )
+    return response
+
+
+@pytest.fixture(autouse=True)
+def stub_ptr(monkeypatch):
+    monkeypatch.setattr(routes.dns, 'resolve_ptr', fake_resolve_ptr)
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(routes.dns, 'reverse_dns_executor', executor)
+    yield
+    executor.shutdown(wait=False)
+
+
+def test_hostnames_attached_and_cached_response_untouched():
+    response = dns_response(['192.0.2.1', '192.0.2.2', '2001:db8::1'])
+    original = copy.deepcopy(response)
+
+    reverse = attach_reverse_dns(response)
+    records = reverse['data']['records']
+    assert [entry['hostnames'] for entry in records['A']] == [['host1.example.com'], []]
+    assert records['AAAA'][0]['hostnames'] == ['host6.example.com']
+    assert 'hostnames' not in records['MX'][0]
+    assert reverse['errors'] == []
+    assert response == original
+
+
+def test_failed_reverse_lookups_are_reported():
+    reverse = attach_reverse_dns(dns_response(['192.0.2.1', '192.0.2.9', '192.0.2.10']))
+
+    hostnames = {entry['ip']: entry['hostnames'] for entry in reverse['data']['records']['A']}
+    assert hostnames == {'192.0.2.1': ['host1.example.com'], '192.0.2.9': [], '192.0.2.10': []}
+    assert 'Reverse DNS query for 192.0.2.9 timed out.' in reverse['errors']
+    assert any(error.startswith('Error querying reverse DNS for 192.0.2.10') for error in reverse['errors'])
+
+
+def test_batch_deadline(monkeypatch):
+    monkeypatch.setattr(Config, 'REVERSE_DNS_DEADLINE_SECONDS', 0.2)
+    started = time.monotonic()
+    reverse = attach_reverse_dns(dns_response(['192.0.2.1', '192.0.2.11']))
+
+    assert time.monotonic() - started < 1
+    assert reverse['errors'] == ['Reverse DNS query for 192.0.2.11 timed out.']
+    assert reverse['data']['records']['A'][0]['hostnames'] == ['host1.example.com']
+
+
+def test_forward_ptr_not_queried(monkeypatch):
+    queried = []
+
+    def fake_resolve(self, domain, rtype_str, *args, **kwargs):
+        queried.append(rtype_str)
+        raise dns.resolver.NoAnswer()
+
+    monkeypatch.setattr(dns.resolver.Resolver, 'resolve', fake_resolve)
+    lookup_dns_records('example.com')
+
+    assert 'PTR' not in DEFAULT_RECORD_TYPES
+    assert queried == DEFAULT_RECORD_TYPES
@@ -0,0 +1,59 @@
+# tests/test_errors.py
+
+import socket
+
+import dns.exception
+import dns.resolver
+import pytest
+import requests
+from urllib3.exceptions import NameResolutionError
+
+import errors
+from cache import TTLCache
+from errors import (
+    ERROR_CONNECTION_REFUSED, ERROR_NXDOMAIN, ERROR_RESPONSE_TOO_LARGE, ERROR_TIMEOUT, ERROR_TOO_MANY_REDIRECTS,
+    ConnectionRefused, TLSFailure, classify_exception, get_cached_failure, get_origin, remember_failure
+)
+from fetcher import FetchLimitExceeded
+
+
+def name_resolution_error(errno):
+    cause = socket.gaierror(errno, 'resolution failed')
+    try:
+        raise NameResolutionError('example.test', None, cause) from cause
+    except NameResolutionError as e:
+        return e
+
+
+@pytest.mark.parametrize('exception, code', [
+    (dns.resolver.NXDOMAIN(), ERROR_NXDOMAIN),
+    (socket.gaierror(socket.EAI_NONAME, 'Name or service not known'), ERROR_NXDOMAIN),
+    (name_resolution_error(socket.EAI_NONAME), ERROR_NXDOMAIN),
+    # A resolver outage is not a missing domain
+    (socket.gaierror(socket.EAI_AGAIN, 'Temporary failure in name resolution'), ERROR_TIMEOUT),
+    (name_resolution_error(socket.EAI_AGAIN), ERROR_TIMEOUT),
+    (dns.exception.Timeout(), ERROR_TIMEOUT),
+    (ConnectionRefusedError(111, 'Connection refused'), ERROR_CONNECTION_REFUSED),
+    (requests.exceptions.TooManyRedirects('Exceeded 10 redirects.'), ERROR_TOO_MANY_REDIRECTS),
+    (FetchLimitExceeded('Response headers too large.'), ERROR_RESPONSE_TOO_LARGE),
+])
+def test_classify_exception(exception, code):
+    assert classify_exception(exception).code == code
+
+
+def test_origin():
+    assert get_origin('http://Example.com/path') == 'http://example.com:80'
+    assert get_origin('https://example.com') == 'https://example.com:443'
+    assert get_origin('http://127.0.0.1:18081/') == 'http://127.0.0.1:18081'
+    assert get_origin('http://example.com:notaport/') is None
+
+
+def test_http_failures_are_remembered_per_origin(monkeypatch):
+    monkeypatch.setattr(errors, 'failure_cache', TTLCache(track_access=False))
+
+    remember_failure('http', get_origin('http://127.0.0.1:1/'), ConnectionRefused('refused'))
+    remember_failure('http', get_origin('https://example.com/'), TLSFailure('bad certificate'))
+
+    assert get_cached_failure('http', get_origin('http://127.0.0.1:1/x')).code == ERROR_CONNECTION_REFUSED
+    assert get_cached_failure('http', get_origin('http://127.0.0.1:18081/')) is None
+    assert get_cached_failure('http', get_origin('http://example.com/')) is None
@@ -0,0 +1,151 @@
+# tests/test_fetcher.py
+
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from fetcher import FetchDeadlineExceeded, FetchLimitExceeded, bounded_fetch, detect_charset
+
+HUGE_BODY_BYTES = 300 * 1024 * 1024
+BLOCK = b'a' * (64 * 1024)
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send_huge_body(self):
+        sent = 0
+        try:
+            while sent < HUGE_BODY_BYTES:
+                self.wfile.write(BLOCK)
+                sent += len(BLOCK)
+        except OSError:
+            pass # The client hung up, as it should
+
+    def do_GET(self):
+        if self.path == '/huge':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(HUGE_BODY_BYTES))
+            self.end_headers()
+            self.send_huge_body()
+        elif self.path == '/redirect-huge':
+            # A redirect hop with a huge body must not be read
+            self.send_response(302)
+            self.send_header('Location', '/small')
+            self.send_header('Content-Length', str(HUGE_BODY_BYTES))
+            self.end_headers()
+            self.send_huge_body()
+        elif self.path == '/loop':
+            self.send_response(302)
+            self.send_header('Location', '/loop')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/small':
+            body = b'<html><head><meta charset="iso-8859-1"></head>caf\xe9</html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/big-headers':
+            self.send_response(200)
+            for index in range(40):
+                self.send_header(f'X-Padding-{index}', 'p' * 2048)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.path == '/drip-body':
+            self.send_response(200)
+            self.send_header('Content-Length', '100000')
+            self.end_headers()
+            self.drip(b'x' * 100000)
+        elif self.path == '/drip-headers':
+            self.wfile.write(b'HTTP/1.1 200 OK\r\n')
+            self.drip(b'X-Slow: ' + b'y' * 100000 + b'\r\n\r\n')
+
+    def drip(self, data):
+        try:
+            for index in range(len(data)):
+                self.wfile.write(data[index:index + 1])
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+
+def fetch_with_peak_memory(url, **kwargs):
+    tracemalloc.start()
+    try:
+        result = bounded_fetch(url, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def test_huge_body_is_truncated_with_flat_memory(serve):
+    base_url = serve(LocalHandler)
+    result, peak = fetch_with_peak_memory(f'{base_url}/huge', max_body_bytes=2 * 1024 * 1024)
+
+    assert result['truncated']
+    assert result['truncation_reason'] == 'max_body_bytes'
+    assert result['body_bytes'] == 2 * 1024 * 1024
+    assert len(result['text']) == 2 * 1024 * 1024
+    # The body bytes plus the decoded text, not the 300 MB the server offered
+    assert peak < 16 * 1024 * 1024
+
+
+def test_redirect_hop_body_is_not_read(serve):
+    base_url = serve(LocalHandler)
+    result, peak = fetch_with_peak_memory(f'{base_url}/redirect-huge')
+
+    response = result['response']
+    assert response.status_code == 200
+    assert response.url == f'{base_url}/small'
+    assert [hop.status_code for hop in response.history] == [302]
+    assert result['text'] == '<html><head><meta charset="iso-8859-1"></head>caf\xe9</html>'
+    assert not result['truncated']
+    assert peak < 16 * 1024 * 1024
+
+
+def test_redirect_limit(serve):
+    base_url = serve(LocalHandler)
+    with pytest.raises(requests.exceptions.TooManyRedirects):
+        bounded_fetch(f'{base_url}/loop', max_redirects=3)
+
+
+def test_oversized_headers_are_rejected(serve):
+    base_url = serve(LocalHandler)
+    with pytest.raises(FetchLimitExceeded):
+        bounded_fetch(f'{base_url}/big-headers', max_header_bytes=64 * 1024)
+    # Under the cap the same response is fine
+    assert bounded_fetch(f'{base_url}/big-headers', max_header_bytes=128 * 1024)['response'].status_code == 200
+
+
+def test_deadline_truncates_slow_body(serve):
+    base_url = serve(LocalHandler)
+    started = time.monotonic()
+    result = bounded_fetch(f'{base_url}/drip-body', deadline=1)
+
+    assert time.monotonic() - started < 3
+    assert result['truncated']
+    assert result['truncation_reason'] == 'deadline_seconds'
+
+
+def test_deadline_covers_slow_headers(serve):
+    base_url = serve(LocalHandler)
+    started = time.monotonic()
+    with pytest.raises(FetchDeadlineExceeded):
+        bounded_fetch(f'{base_url}/drip-headers', deadline=1)
+    assert time.monotonic() - started < 3
+
+
+def test_declared_charset_wins_over_detection():
+    class Response:
+        headers = {'Content-Type': 'text/html; charset=windows-1252'}
+
+    assert detect_charset(Response(), b'\xe9t\xe9') == 'cp1252'
@@ -0,0 +1,94 @@
+# tests/test_header_analysis.py
+
+import json
+import os
+
+import pytest
+
+from header_analysis import analyze_headers, parse_cache_control, parse_csp, parse_hsts, parse_set_cookie
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'response_headers.json')
+
+with open(FIXTURES_PATH) as f:
+    FIXTURES = json.load(f)
+
+
+def messages(parsed):
+    return [finding['message'] for finding in parsed['findings']]
+
+
+def test_csp_directives_and_risky_sources():
+    parsed = parse_csp("default-src 'self'; script-src 'self' 'unsafe-inline' https:; SCRIPT-SRC *; object-src 'none'")
+
+    assert parsed['directives'] == {
+        'default-src': ["'self'"],
+        'script-src': ["'self'", "'unsafe-inline'", 'https:'],
+        'object-src': ["'none'"]
+    }
+    assert "'script-src' allows 'unsafe-inline'." in messages(parsed)
+    assert "'script-src' allows content from any host or scheme." in messages(parsed)
+    assert "'base-uri' is not set." in messages(parsed)
+
+
+def test_csp_nonce_disables_unsafe_inline():
+    parsed = parse_csp("script-src 'nonce-abc' 'unsafe-inline'; object-src 'none'; base-uri 'none'; frame-ancestors 'none'")
+    assert parsed['findings'] == []
+
+
+def test_hsts():
+    parsed = parse_hsts('max-age=63072000; includeSubDomains; preload')
+    assert (parsed['max_age'], parsed['include_subdomains'], parsed['preload'], parsed['preload_ready']) == (
+        63072000, True, True, True
+    )
+    assert parse_hsts('max-age=0')['findings'][0]['severity'] == 'high'
+    assert parse_hsts('max-age="86400"; preload')['preload_ready'] is False
+    assert parse_hsts('includeSubDomains')['max_age'] is None
+
+
+def test_set_cookie_split_keeps_expires_date_together():
+    parsed = parse_set_cookie(
+        'id=a3fWa; Expires=Wed, 21 Oct 2015 07:28:00 GMT; Secure; HttpOnly; SameSite=lax, '
+        'theme=dark; Path=/'
+    )
+
+    assert parsed['cookies'] == [
+        {'name': 'id', 'secure': True, 'http_only': True, 'same_site': 'Lax'},
+        {'name': 'theme', 'secure': False, 'http_only': False, 'same_site': None}
+    ]
+    assert "Cookie 'theme' is missing the Secure flag." in messages(parsed)
+
+
+def test_set_cookie_same_site_none_needs_secure():
+    parsed = parse_set_cookie('cart=1; SameSite=None')
+    assert "Cookie 'cart' uses SameSite=None without Secure, so browsers reject it." in messages(parsed)
+
+
+def test_cache_control():
+    parsed = parse_cache_control('public, max-age=31536000, s-maxage=600, immutable')
+    assert (parsed['max_age'], parsed['s_maxage'], parsed['immutable'], parsed['shared_cacheable']) == (
+        31536000, 600, True, True
+    )
+
+    parsed = parse_cache_control('private, no-cache, max-age')
+    assert parsed['max_age'] is None
+    assert parsed['cacheable'] and not parsed['shared_cacheable']
+    assert parsed['must_revalidate']
+
+    assert parse_cache_control('no-store')['cacheable'] is False
+
+
+@pytest.mark.parametrize('fixture', FIXTURES, ids=[fixture['name'] for fixture in FIXTURES])
+def test_fixture_corpus(fixture):
+    analysis = analyze_headers(fixture['headers'], fixture['url'])
+    assert 0 <= analysis['score'] <= 100
+    assert analysis['grade'] in 'ABCDEF'
+    # Memoised: the same header values give the very same analysis object
+    assert analyze_headers(dict(fixture['headers']), fixture['url']) is analysis
+
+
+def test_fixture_grades():
+    grades = {fixture['name']: analyze_headers(fixture['headers'], fixture['url'])['grade'] for fixture in FIXTURES}
+    assert grades['strict-modern-app'] == 'A'
+    assert grades['github'] == 'A'
+    assert grades['misconfigured-hsts-cookies'] == 'F'
+    assert grades['legacy-apache-http'] == 'F'
@@ -0,0 +1,92 @@
+# tests/test_history.py
+
+import sqlite3
+import threading
+
+import pytest
+
+import history
+from config import Config
+
+
+@pytest.fixture(autouse=True)
+def history_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_DB_PATH', str(tmp_path / 'history.sqlite3'))
+    monkeypatch.setattr(history, '_pool', None)
+
+
+def dns_response(address, ttl=300):
+    return {'data': {'domain': 'example.com', 'records': {'A': [{'ip': address, 'ttl': ttl}]}}}
+
+
+def test_unchanged_results_are_compacted():
+    first_hash = history.record_result('dns', 'example.com', dns_response('192.0.2.1', ttl=300))
+    # Only the TTL differs, which is not part of the normalised result
+    assert history.record_result('dns', 'example.com', dns_response('192.0.2.1', ttl=120)) == first_hash
+    second_hash = history.record_result('dns', 'example.com', dns_response('192.0.2.2'))
+
+    changes = history.get_changes('dns', 'example.com')
+    assert [(change['hash'], change['snapshots']) for change in changes] == [(first_hash, 2), (second_hash, 1)]
+    assert history.get_latest_change('dns', 'example.com')['hash'] == second_hash
+
+    with history.history_connection() as connection:
+        row_count = connection.execute('SELECT COUNT(*) FROM changes').fetchone()[0]
+    assert row_count == 2
+
+
+def test_diff_between_results():
+    first_hash = history.record_result('dns', 'example.com', dns_response('192.0.2.1'))
+    second_hash = history.record_result('dns', 'example.com', dns_response('192.0.2.2'))
+
+    diff = history.diff_results(history.load_result(first_hash), history.load_result(second_hash))
+    assert diff == [
+        {'path': 'records.A', 'change': 'removed', 'old': {'ip': '192.0.2.1'}},
+        {'path': 'records.A', 'change': 'added', 'new': {'ip': '192.0.2.2'}}
+    ]
+
+
+def test_old_changes_and_orphaned_results_expire(monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_MAX_CHANGES', 3)
+    hashes = [history.record_result('dns', 'example.com', dns_response(f'192.0.2.{index}')) for index in range(5)]
+
+    assert [change['hash'] for change in history.get_changes('dns', 'example.com')] == hashes[2:]
+    assert history.load_result(hashes[0]) is None
+    assert history.load_result(hashes[2]) is not None
+
+
+def test_no_history():
+    assert history.get_latest_change('dns', 'example.org') is None
+    assert history.get_changes('dns', 'example.org') == []
+
+
+def test_concurrent_identical_results_make_one_change():
+    barrier = threading.Barrier(8)
+
+    def record():
+        barrier.wait()
+        for _ in range(20):
+            history.record_result('dns', 'example.com', dns_response('192.0.2.1'))
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    changes = history.get_changes('dns', 'example.com')
+    assert len(changes) == 1
+    assert changes[0]['snapshots'] == 160
+
+
+def test_history_route_reports_store_errors(monkeypatch):
+    import routes.history
+    from app import app
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(routes.history, 'get_changes', locked)
+    monkeypatch.setattr(Config, 'WATCH_ENABLED', False)
+    response = app.test_client().get('/history?kind=dns&target=example.com')
+    assert response.status_code == 503
+    assert response.json['error_code'] == 'INTERNAL_ERROR'
@@ -0,0 +1,82 @@
+# tests/test_resolver.py
+
+import socket
+import time
+
+import dns.exception
+import dns.resolver
+import pytest
+
+import resolver
+
+
+class FakeResolver:
+    """
+    Stands in for the shared dnspython resolver: answers[rtype] is a list of
+    addresses or an exception to raise, after delays[rtype] seconds.
+    """
+
+    def __init__(self, answers, delays=None):
+        self.answers = answers
+        self.delays = delays or {}
+
+    def resolve(self, host, rtype_str):
+        time.sleep(self.delays.get(rtype_str, 0))
+        answer = self.answers[rtype_str]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+    yield server.getsockname()[1]
+    server.close()
+
+
+def use_resolver(monkeypatch, fake):
+    monkeypatch.setattr(resolver, 'get_shared_resolver', lambda: fake)
+
+
+def fail_system_resolve(host):
+    raise AssertionError('the system resolver must not be used')
+
+
+def test_connects_on_first_answer_without_waiting_for_slow_aaaa(monkeypatch, listener):
+    use_resolver(monkeypatch, FakeResolver({'AAAA': ['::1'], 'A': ['127.0.0.1']}, delays={'AAAA': 3}))
+    started = time.monotonic()
+    sock, family, address = resolver.happy_eyeballs_connect('example.test', listener, timeout=5)
+    sock.close()
+
+    assert (family, address) == (socket.AF_INET, '127.0.0.1')
+    assert time.monotonic() - started < 1
+
+
+def test_dns_timeout_is_a_temporary_failure(monkeypatch, listener):
+    timeout = dns.exception.Timeout()
+    use_resolver(monkeypatch, FakeResolver({'AAAA': timeout, 'A': timeout}))
+    monkeypatch.setattr(resolver, 'system_resolve', fail_system_resolve)
+
+    with pytest.raises(socket.gaierror) as excinfo:
+        resolver.happy_eyeballs_connect('example.test', listener, timeout=5)
+    assert excinfo.value.errno == socket.EAI_AGAIN
+
+
+def test_nxdomain_falls_back_to_system_resolver(monkeypatch, listener):
+    use_resolver(monkeypatch, FakeResolver({'AAAA': dns.resolver.NXDOMAIN(), 'A': dns.resolver.NXDOMAIN()}))
+    monkeypatch.setattr(resolver, 'system_resolve', lambda host: [(socket.AF_INET, '127.0.0.1')])
+
+    sock, family, address = resolver.happy_eyeballs_connect('localhost', listener, timeout=5)
+    sock.close()
+    assert address == '127.0.0.1'
+
+
+def test_timeout_bounds_slow_dns(monkeypatch, listener):
+    use_resolver(monkeypatch, FakeResolver({'AAAA': ['::1'], 'A': ['127.0.0.1']}, delays={'AAAA': 3, 'A': 3}))
+    started = time.monotonic()
+    with pytest.raises(socket.timeout):
+        resolver.happy_eyeballs_connect('example.test', listener, timeout=0.5)
+    assert time.monotonic() - started < 1
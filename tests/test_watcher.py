@@ -0,0 +1,130 @@
+# tests/test_watcher.py
+
+import time
+
+import pytest
+
+import cache
+import watcher
+from cache import TTLCache, make_cache_key
+from config import Config
+from watcher import WatchScheduler
+
+TTL = 100
+
+
+class RecordingExecutor:
+    """
+    Collects the refreshes a tick submits instead of running them.
+    """
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, key, kind, target):
+        self.submitted.append(key)
+
+
+@pytest.fixture
+def lookups():
+    return {}
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch, lookups):
+    result_cache = TTLCache(track_access=True)
+    monkeypatch.setattr(cache, 'result_cache', result_cache)
+    monkeypatch.setattr(watcher, 'result_cache', result_cache)
+    monkeypatch.setattr(Config, 'HISTORY_ENABLED', False)
+    monkeypatch.setattr(Config, 'WATCH_REFRESH_LEAD', 0.2)
+    monkeypatch.setattr(Config, 'WATCH_JITTER', 0.1)
+    monkeypatch.setattr(Config, 'WATCH_MAX_CONCURRENT_REFRESHES', 2)
+    monkeypatch.setattr(Config, 'WATCH_RETRY_SECONDS', 60)
+    monkeypatch.setattr(watcher.random, 'uniform', lambda low, high: 0)
+
+    def fake_lookup(target):
+        return lookups.get(target, ({'success': True, 'data': {'target': target}}, 200))
+
+    monkeypatch.setattr(watcher, 'WATCH_KINDS', {
+        'fake': {'lookup': fake_lookup, 'ttl': TTL, 'normalize': lambda target: target}
+    })
+
+    watch_scheduler = WatchScheduler(str(tmp_path / 'watchlist.json'))
+    watch_scheduler._executor = RecordingExecutor()
+    return watch_scheduler
+
+
+def cache_for(target, seconds_left):
+    cache.result_cache.set(make_cache_key('fake', target), ({'success': True}, 200), seconds_left)
+
+
+def set_hits(scheduler, hits_by_target):
+    def update(state):
+        for target, hits in hits_by_target.items():
+            state['entries'][make_cache_key('fake', target)]['hits'] = hits
+        return True
+    scheduler._update_state(update)
+
+
+def test_refreshes_entries_due_within_lead_plus_jitter(scheduler, monkeypatch):
+    monkeypatch.setattr(Config, 'WATCH_MAX_CONCURRENT_REFRESHES', 10)
+    for target in ('missing', 'expiring', 'fresh', 'jittered'):
+        scheduler.add('fake', target)
+    cache_for('expiring', 15) # Within the lead of 20% of the TTL
+    cache_for('fresh', 90)
+    cache_for('jittered', 25) # Only due with jitter
+    scheduler._status[make_cache_key('fake', 'jittered')] = {'jitter': 10}
+
+    scheduler._tick()
+    assert sorted(scheduler._executor.submitted) == ['fake:expiring', 'fake:jittered', 'fake:missing']
+
+
+def test_concurrency_cap_and_priority_by_hits(scheduler):
+    for target in ('rare', 'popular', 'medium'):
+        scheduler.add('fake', target)
+    set_hits(scheduler, {'rare': 1, 'popular': 50, 'medium': 5})
+
+    scheduler._tick()
+    assert scheduler._executor.submitted == ['fake:popular', 'fake:medium']
+
+    # Both slots are still busy, so nothing more starts
+    scheduler._tick()
+    assert scheduler._executor.submitted == ['fake:popular', 'fake:medium']
+
+    scheduler._refresh('fake:popular', 'fake', 'popular')
+    scheduler._tick()
+    assert scheduler._executor.submitted == ['fake:popular', 'fake:medium', 'fake:rare']
+    assert scheduler._status['fake:popular']['last_status_code'] == 200
+    assert cache.result_cache.get_expiry('fake:popular') is not None
+
+
+def test_failed_refresh_backs_off(scheduler, lookups):
+    lookups['down'] = ({'success': False}, 502)
+    scheduler.add('fake', 'down')
+
+    scheduler._tick()
+    scheduler._refresh('fake:down', 'fake', 'down')
+    status = scheduler._status['fake:down']
+    assert status['last_status_code'] == 502
+    assert status['retry_at'] == pytest.approx(time.time() + 60, abs=5)
+
+    scheduler._tick()
+    assert scheduler._executor.submitted == ['fake:down']
+
+    status['retry_at'] = time.time() - 1
+    scheduler._tick()
+    assert scheduler._executor.submitted == ['fake:down', 'fake:down']
+
+
+def test_watch_list_persists_across_instances(scheduler):
+    scheduler.add('fake', 'example.com')
+    scheduler.add('fake', 'example.org')
+    set_hits(scheduler, {'example.org': 3})
+
+    reloaded = WatchScheduler(scheduler.state_path)
+    entries = reloaded.list_entries()
+    assert [(entry['target'], entry['hits']) for entry in entries] == [('example.org', 3), ('example.com', 0)]
+
+    assert reloaded.remove('fake', 'example.com')
+    assert not reloaded.remove('fake', 'example.com')
+    assert [entry['target'] for entry in WatchScheduler(scheduler.state_path).list_entries()] == ['example.org']
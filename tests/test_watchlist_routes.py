@@ -0,0 +1,35 @@
+# tests/test_watchlist_routes.py
+
+import pytest
+
+import routes.watchlist
+from app import app
+from watcher import WatchScheduler
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(routes.watchlist, 'watch_scheduler', WatchScheduler(str(tmp_path / 'watchlist.json')))
+    monkeypatch.setattr('config.Config.WATCH_ENABLED', False)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    {'kind': 1, 'target': 'example.com'},
+    {'kind': 'dns', 'target': None},
+    ['x'],
+    {'kind': 'dns', 'target': 'not a domain'},
+])
+def test_invalid_watch_requests_are_rejected(client, body):
+    for method in (client.post, client.delete):
+        response = method('/watchlist', json=body)
+        assert response.status_code == 400
+        assert response.json['error_code'] == 'INVALID_INPUT'
+
+
+def test_add_and_remove(client):
+    response = client.post('/watchlist', json={'kind': 'dns', 'target': 'example.com'})
+    assert response.status_code == 201
+    assert client.get('/watchlist').json['data']['entries'][0]['target'] == 'example.com'
+    assert client.delete('/watchlist', json={'kind': 'dns', 'target': 'example.com'}).status_code == 200
+    assert client.delete('/watchlist', json={'kind': 'dns', 'target': 'example.com'}).status_code == 404
@@ -16,9 +16,10 @@ def get_record_type_name(rdtype):
     """
     return dns.rdatatype.to_text(rdtype)
 
-def create_response(success, message, data=None, errors=None, status_code=200):
+def create_response(success, message, data=None, errors=None, status_code=200, error_code=None):
     """
     Creates a standardized JSON response dictionary.
+    error_code is one of the stable codes in errors.py (None on success).
     """
     if data is None:
         data = {}
@@ -29,6 +30,7 @@ def create_response(success, message, data=None, errors=None, status_code=200):
         'success': success,
         'message': message,
         'data': data,
-        'errors': errors
+        'errors': errors,
+        'error_code': error_code
     }
     return response, status_code
\ No newline at end of file
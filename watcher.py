@@ -0,0 +1,324 @@
+# watcher.py
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from config import Config
+from cache import result_cache, make_cache_key, run_lookup
+from routes.dns import lookup_dns_records, is_valid_domain as is_valid_dns_domain
+from routes.whois_checker import lookup_whois, is_valid_domain as is_valid_whois_domain
+from routes.header_checker import lookup_headers, normalize_url
+
+try:
+    import fcntl # Used to serialise state file updates between worker processes
+except ImportError: # Windows
+    fcntl = None
+
+
+def normalize_domain(validator):
+    """
+    Wraps a domain validator so it returns the domain (or None) like normalize_url does.
+    """
+    def normalize(domain):
+        return domain if validator(domain) else None
+    return normalize
+
+
+# Lookups that can be watched: how to run them, how long results stay cached
+# and how to validate a target before it is added to the watch list.
+WATCH_KINDS = {
+    'dns': {
+        'lookup': lookup_dns_records,
+        'ttl': Config.DNS_RESULT_TTL,
+        'normalize': normalize_domain(is_valid_dns_domain)
+    },
+    'whois': {
+        'lookup': lookup_whois,
+        'ttl': Config.WHOIS_RESULT_TTL,
+        'normalize': normalize_domain(is_valid_whois_domain)
+    },
+    'header': {
+        'lookup': lookup_headers,
+        'ttl': Config.HEADER_RESULT_TTL,
+        'normalize': normalize_url
+    }
+}
+
+
+def normalize_target(kind, target):
+    """
+    Checks the kind and target of a lookup.
+    Returns (normalized_target, None) or (None, error_message).
+    """
+    if kind not in WATCH_KINDS:
+        return None, f"Invalid kind. Use one of: {', '.join(WATCH_KINDS)}."
+    if not target:
+        return None, 'Target parameter is missing.'
+    normalized_target = WATCH_KINDS[kind]['normalize'](target)
+    if normalized_target is None:
+        return None, f"Invalid target for a {kind} check."
+    return normalized_target, None
+
+
+class WatchScheduler:
+    """
+    Keeps the results of watched lookups warm in result_cache.
+
+    A background thread wakes every WATCH_TICK_SECONDS and refreshes entries
+    whose cached result is missing or will expire within WATCH_REFRESH_LEAD
+    (a fraction of the TTL), plus a random jitter so entries added together
+    don't refresh together. At most WATCH_MAX_CONCURRENT_REFRESHES run at
+    once; when more are due, the most frequently requested go first. Failed
+    refreshes are retried after WATCH_RETRY_SECONDS.
+
+    The watch list and request counts are persisted as JSON at state_path.
+    Every process re-reads that file each tick, so changes made through any
+    worker are picked up by all of them. With a shared cache backend only one
+    process (the leader) runs refreshes; with per-process caches each does.
+    """
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self._entries = {} # key -> persisted entry
+        self._status = {} # key -> refresh status in this process
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._leader_file = None
+        self._pid = None # Process the refresh thread runs in
+        self._start_lock = threading.Lock()
+
+    # --- Persistence ---
+
+    def _update_state(self, update=None):
+        """
+        Loads the state file under an exclusive lock, applies update(state) and
+        writes the file back if update returned True. Returns the state.
+        """
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path + '.lock', 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path) as state_file:
+                        state = json.load(state_file)
+                except (FileNotFoundError, ValueError):
+                    state = {'entries': {}}
+
+                if update is not None and update(state):
+                    temp_path = self.state_path + '.tmp'
+                    with open(temp_path, 'w') as state_file:
+                        json.dump(state, state_file, indent=2)
+                    os.replace(temp_path, self.state_path)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        with self._lock:
+            self._entries = state['entries']
+        return state
+
+    def _merge_access_counts(self):
+        """
+        Adds the requests this process has served since the last tick to the persisted counts.
+        """
+        counts = result_cache.drain_access_counts()
+
+        def update(state):
+            changed = False
+            for key, entry in state['entries'].items():
+                if counts.get(key):
+                    entry['hits'] = entry.get('hits', 0) + counts[key]
+                    changed = True
+            return changed
+
+        self._update_state(update)
+
+    # --- Watch list API ---
+
+    def add(self, kind, target):
+        """
+        Adds a lookup to the watch list and returns its entry.
+        """
+        key = make_cache_key(kind, target)
+
+        def update(state):
+            if key in state['entries']:
+                return False
+            state['entries'][key] = {
+                'kind': kind,
+                'target': target,
+                'added_at': datetime.now(timezone.utc).isoformat(),
+                'hits': 0
+            }
+            return True
+
+        state = self._update_state(update)
+        self._wake()
+        return self._describe(key, state['entries'][key])
+
+    def remove(self, kind, target):
+        """
+        Removes a lookup from the watch list. Returns False if it wasn't watched.
+        """
+        key = make_cache_key(kind, target)
+        removed = []
+
+        def update(state):
+            if state['entries'].pop(key, None) is None:
+                return False
+            removed.append(key)
+            return True
+
+        self._update_state(update)
+        with self._lock:
+            self._status.pop(key, None)
+        return bool(removed)
+
+    def list_entries(self):
+        """
+        Returns all watched lookups, most requested first.
+        """
+        state = self._update_state()
+        entries = [self._describe(key, entry) for key, entry in state['entries'].items()]
+        return sorted(entries, key=lambda entry: entry['hits'], reverse=True)
+
+    def _describe(self, key, entry):
+        with self._lock:
+            status = dict(self._status.get(key, {}))
+        expires_at = result_cache.get_expiry(key)
+        return {
+            **entry,
+            'cached': expires_at is not None,
+            'cache_expires_at': datetime.fromtimestamp(expires_at, timezone.utc).isoformat() if expires_at else None,
+            'last_refreshed_at': status.get('last_refreshed_at'),
+            'last_status_code': status.get('last_status_code')
+        }
+
+    # --- Scheduling ---
+
+    def start(self):
+        """
+        Starts the background refresh thread (no-op if already running in this process).
+
+        Threads don't survive a fork, so a scheduler started before forking
+        (e.g. under gunicorn --preload) starts afresh in the child.
+        """
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # Forked: the parent's threads, locks and leader lock don't carry over
+                self._lock = threading.Lock()
+                self._in_flight = set()
+                self._stop_event = threading.Event()
+                self._wake_event = threading.Event()
+                self._leader_file = None
+            self._executor = ThreadPoolExecutor(
+                max_workers=Config.WATCH_MAX_CONCURRENT_REFRESHES,
+                thread_name_prefix='watch-refresh'
+            )
+            self._thread = threading.Thread(target=self._run, name='watch-scheduler', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _wake(self):
+        # Run the next tick now, e.g. so a newly added entry is fetched straight away
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._tick()
+            except Exception:
+                pass # Never let one bad tick kill the scheduler
+            self._wake_event.wait(Config.WATCH_TICK_SECONDS)
+            self._wake_event.clear()
+
+    def _is_leader(self):
+        """
+        With a shared cache one process refreshing is enough: the first to take an
+        exclusive lock on the leader file does it, and another takes over if it exits.
+        """
+        if self._leader_file is not None or fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        leader_file = open(self.state_path + '.leader', 'a')
+        try:
+            fcntl.flock(leader_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            leader_file.close()
+            return False
+        self._leader_file = leader_file # Held open (and locked) for the life of the process
+        return True
+
+    def _tick(self):
+        self._merge_access_counts()
+        if result_cache.shared and not self._is_leader():
+            return
+        now = time.time()
+
+        with self._lock:
+            entries = dict(self._entries)
+            slots = Config.WATCH_MAX_CONCURRENT_REFRESHES - len(self._in_flight)
+            due = []
+            for key, entry in entries.items():
+                if key in self._in_flight or entry['kind'] not in WATCH_KINDS:
+                    continue
+                ttl = WATCH_KINDS[entry['kind']]['ttl']
+                status = self._status.setdefault(key, {})
+                if 'jitter' not in status:
+                    status['jitter'] = random.uniform(0, ttl * Config.WATCH_JITTER)
+                if status.get('retry_at', 0) > now:
+                    continue
+                expires_at = result_cache.get_expiry(key)
+                if expires_at is None or expires_at - now <= ttl * Config.WATCH_REFRESH_LEAD + status['jitter']:
+                    due.append((entry.get('hits', 0), key, entry))
+
+            # Most requested first
+            due.sort(key=lambda item: item[0], reverse=True)
+            for _, key, entry in due[:max(slots, 0)]:
+                self._in_flight.add(key)
+                self._executor.submit(self._refresh, key, entry['kind'], entry['target'])
+
+    def _refresh(self, key, kind, target):
+        watch_kind = WATCH_KINDS[kind]
+        try:
+            _, status_code = run_lookup(kind, target, watch_kind['lookup'], watch_kind['ttl'])
+        except Exception:
+            status_code = None
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+                if key in self._entries:
+                    self._status[key] = {
+                        'last_refreshed_at': datetime.now(timezone.utc).isoformat(),
+                        'last_status_code': status_code,
+                        # Re-roll the jitter so entries drift apart over time
+                        'jitter': random.uniform(0, watch_kind['ttl'] * Config.WATCH_JITTER),
+                        # Failed results aren't cached, so back off instead of retrying every tick
+                        'retry_at': time.time() + Config.WATCH_RETRY_SECONDS if status_code != 200 else 0
+                    }
+
+
+watch_scheduler = WatchScheduler(Config.WATCH_STATE_PATH)